@@ -92,16 +92,13 @@ def test_current_config():
         Konfigurasi aktif saat ini
     """
     try:
-        rag_params = ai_config_service.get_active_rag_params()
-        all_configs = ai_config_service.get_all_configs()
+        config = ai_config_service.get_config_snapshot()
         
         return {
-            "rag_params": rag_params,
-            "llm_params": {
-                "temperature": float(all_configs.get("temperature", 0.7)),
-                "max_tokens": int(all_configs.get("max_tokens", 1024))
-            },
-            "api_key_status": "Set" if ai_config_service.get_active_gemini_key() else "Not Set"
+            "rag_params": ai_config_service.get_active_rag_params(config),
+            "llm_params": ai_config_service.get_active_llm_params(config),
+            "api_key_status": "Set" if ai_config_service.get_active_gemini_key(config) else "Not Set",
+            "config_version": config.version
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
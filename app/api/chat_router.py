@@ -1,19 +1,79 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.core.dependencies import get_current_admin
 from app.schemas.auth_schemas import AdminUser
 from app.schemas.chat_schemas import ChatRequest, ChatResponse
-from app.services.ai_config_service import get_active_rag_params
-from app.services.embedding_service import (generate_embedding,
-                                            normalize_vector, preprocess_text)
+from app.services.ai_config_service import (get_active_rag_params,
+                                            get_config_snapshot_async)
+from app.services.embedding_service import embed_query_async
 from app.services.llm_service import chat_with_rag
 from app.services.rag_service import rag_pipeline
 
 router = APIRouter()
 
 
+async def compute_answer_metrics(
+    question: str,
+    generated: Optional[str],
+    sources: List[Dict[str, Any]]
+) -> Optional[Dict[str, Optional[float]]]:
+    """
+    Metrik reference-free dari embedding:
+    - faithfulness: similarity antara jawaban dan gabungan context
+    - relevance: similarity antara jawaban dan pertanyaan
+    - context_precision: fraksi sumber dengan similarity jawaban-sumber >= threshold
+    
+    Returns:
+        Dict metrik, atau None jika tidak bisa dihitung
+    """
+    try:
+        if not (generated and question):
+            return None
+        
+        # embeddings: preprocess + generate + normalize (cached)
+        q_emb = await embed_query_async(question)
+        a_emb = await embed_query_async(generated)
+
+        # cosine helper (vectors are already normalized)
+        def cos(u, v):
+            return float(np.dot(u, v)) if u.size and u.shape == v.shape else 0.0
+
+        relevance = float(cos(a_emb, q_emb))
+
+        # context concat
+        if sources:
+            concat = " ".join([s.get("content", "") for s in sources])
+            concat_emb = await embed_query_async(concat)
+            faithfulness = float(cos(a_emb, concat_emb))
+
+            # per-source sims
+            thr = 0.65
+            count_relevant = 0
+            for s in sources:
+                s_content = s.get("content") or ""
+                s_emb = await embed_query_async(s_content)
+                sim = cos(a_emb, s_emb)
+                if sim >= thr:
+                    count_relevant += 1
+            context_precision = count_relevant / len(sources) if sources else 0.0
+        else:
+            faithfulness = None
+            context_precision = None
+
+        return {
+            "faithfulness": round(faithfulness, 4) if faithfulness is not None else None,
+            "relevance": round(relevance, 4),
+            "context_precision": round(context_precision, 4) if context_precision is not None else None,
+        }
+    except Exception:
+        return None
+
+
 @router.post("/", response_model=ChatResponse)
-def chat_endpoint(
+async def chat_endpoint(
     request: ChatRequest,
     current_admin: AdminUser = Depends(get_current_admin)
 ):
@@ -24,73 +84,32 @@ def chat_endpoint(
     """
     try:
         # Get active RAG params from AI config
-        active_params = get_active_rag_params()
+        config = await get_config_snapshot_async()
+        active_params = get_active_rag_params(config)
 
         # Use RAG params from AI config stored in database (do not accept from request)
         top_k = active_params["top_k"]
         min_similarity = active_params["min_similarity"]
         # 1. RAG: Search similar services
-        rag_result = rag_pipeline(
+        rag_result = await rag_pipeline(
             user_query=request.query,
             top_k=top_k,
             similarity_threshold=min_similarity
         )
         
         # 2. LLM: Generate response dengan Gemini
-        chat_result = chat_with_rag(
+        chat_result = await chat_with_rag(
             user_query=request.query,
-            search_results=rag_result["search_results"]
+            search_results=rag_result["search_results"],
+            config=config
         )
 
         # 3. Compute lightweight reference-free metrics using embeddings (if possible)
-        #   - faithfulness: similarity between answer and concatenated context
-        #   - relevance: similarity between answer and question
-        #   - context_precision: fraction of sources with answer-source sim >= threshold
-        try:
-            generated = chat_result.get("response")
-            question = request.query
-            sources = rag_result.get("search_results", [])
-
-            if generated and question:
-                # embeddings: preprocess + generate + normalize
-                q_emb = normalize_vector(generate_embedding(preprocess_text(question)))
-                a_emb = normalize_vector(generate_embedding(preprocess_text(generated)))
-
-                # cosine helper
-                def cos(u, v):
-                    return sum(x * y for x, y in zip(u, v)) if u and v and len(u) == len(v) else 0.0
-
-                relevance = float(cos(a_emb, q_emb))
-
-                # context concat
-                if sources:
-                    concat = " ".join([s.get("content", "") for s in sources])
-                    concat_emb = normalize_vector(generate_embedding(preprocess_text(concat)))
-                    faithfulness = float(cos(a_emb, concat_emb))
-
-                    # per-source sims
-                    thr = 0.65
-                    count_relevant = 0
-                    for s in sources:
-                        s_content = s.get("content") or ""
-                        s_emb = normalize_vector(generate_embedding(preprocess_text(s_content)))
-                        sim = cos(a_emb, s_emb)
-                        if sim >= thr:
-                            count_relevant += 1
-                    context_precision = count_relevant / len(sources) if sources else 0.0
-                else:
-                    faithfulness = None
-                    context_precision = None
-
-                metrics = {
-                    "faithfulness": round(faithfulness, 4) if faithfulness is not None else None,
-                    "relevance": round(relevance, 4),
-                    "context_precision": round(context_precision, 4) if context_precision is not None else None,
-                }
-            else:
-                metrics = None
-        except Exception:
-            metrics = None
+        metrics = await compute_answer_metrics(
+            question=request.query,
+            generated=chat_result.get("response"),
+            sources=rag_result.get("search_results", [])
+        )
 
         # Attach metrics into response payload
         try:
@@ -18,7 +18,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=AdminDashboard)
-def get_dashboard(
+async def get_dashboard(
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
@@ -32,14 +32,14 @@ def get_dashboard(
         - Pemeriksaan Kesehatan Sistem
     """
     try:
-        dashboard_data = get_complete_dashboard()
+        dashboard_data = await get_complete_dashboard()
         return AdminDashboard(**dashboard_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate dashboard: {str(e)}")
 
 
 @router.get("/knowledge-base", response_model=KnowledgeBaseStats)
-def get_knowledge_base_stats_endpoint(
+async def get_knowledge_base_stats_endpoint(
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
@@ -47,14 +47,14 @@ def get_knowledge_base_stats_endpoint(
     Membutuhkan autentikasi admin.
     """
     try:
-        stats = get_knowledge_base_stats()
+        stats = await get_knowledge_base_stats()
         return KnowledgeBaseStats(**stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/ai-config", response_model=AIConfigStatus)
-def get_ai_config_status_endpoint(
+async def get_ai_config_status_endpoint(
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
@@ -62,14 +62,14 @@ def get_ai_config_status_endpoint(
     Membutuhkan autentikasi admin.
     """
     try:
-        status = get_ai_config_status()
+        status = await get_ai_config_status()
         return AIConfigStatus(**status)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/chat-analytics", response_model=ChatAnalytics)
-def get_chat_analytics_endpoint(
+async def get_chat_analytics_endpoint(
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
@@ -77,14 +77,14 @@ def get_chat_analytics_endpoint(
     Membutuhkan autentikasi admin.
     """
     try:
-        analytics = get_chat_analytics()
+        analytics = await get_chat_analytics()
         return ChatAnalytics(**analytics)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/system-health", response_model=SystemHealth)
-def get_system_health_endpoint(
+async def get_system_health_endpoint(
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """
@@ -92,7 +92,7 @@ def get_system_health_endpoint(
     Membutuhkan autentikasi admin.
     """
     try:
-        health = get_system_health()
+        health = await get_system_health()
         return SystemHealth(**health)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -8,7 +8,8 @@ from app.schemas.mpp_service_schemas import (Service, ServiceCreate,
                                              ServiceUpdate)
 from app.services.mpp_service import (create_service, create_services,
                                       delete_service, get_service,
-                                      get_services, update_service)
+                                      get_services, reindex_services,
+                                      update_service)
 
 router = APIRouter()
 
@@ -28,6 +29,21 @@ def create_services_bulk_endpoint(
     """Buat banyak layanan sekaligus (bulk). Membutuhkan autentikasi admin."""
     return create_services(services)
 
+@router.post("/reindex", response_model=dict)
+def reindex_services_endpoint(
+    force: bool = False,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """
+    Generate ulang embedding (batch) untuk layanan yang teksnya berubah.
+    Gunakan force=true untuk embed ulang semua layanan. Membutuhkan autentikasi admin.
+    """
+    try:
+        total = reindex_services(force=force)
+        return {"result": "success", "reindexed": total}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/", response_model=List[Service])
 def list_services_endpoint(
     current_admin: AdminUser = Depends(get_current_admin)
@@ -9,13 +9,13 @@ router = APIRouter()
 
 
 @router.post("/search", response_model=RAGQueryResponse, include_in_schema=False)
-def search_services_endpoint(
+async def search_services_endpoint(
     request: RAGQueryRequest,
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """Endpoint internal RAG untuk pencarian (test admin). Membutuhkan autentikasi admin."""
     try:
-        result = rag_pipeline(
+        result = await rag_pipeline(
             user_query=request.query,
             top_k=request.top_k,
             similarity_threshold=request.similarity_threshold
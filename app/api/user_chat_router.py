@@ -1,26 +1,124 @@
-from typing import Optional
+import json
+from typing import AsyncIterator, Optional, Tuple
 from uuid import UUID
 
+import anyio
 from fastapi import APIRouter, Cookie, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
 from app.schemas.user_chat_schemas import (ConversationHistoryResponse,
                                            NewSessionResponse, UserChatRequest,
                                            UserChatResponse)
-from app.services.ai_config_service import get_active_rag_params
-from app.services.llm_service import chat_with_rag_and_history
+from app.services.ai_config_service import (AIConfigSnapshot,
+                                            get_active_rag_params,
+                                            get_config_snapshot_async)
+from app.services import answer_cache, fast_path
+from app.services.embedding_service import embed_query_async
+from app.services.intent_service import (get_no_match_reply,
+                                         get_small_talk_reply)
+from app.services.llm_service import (ERROR_RESPONSE_PREFIX,
+                                      chat_with_rag_and_history,
+                                      generate_response_with_history_stream)
 from app.services.rag_service import rag_pipeline
 from app.services.session_service import (add_message_to_history,
                                           create_session,
                                           get_conversation_history,
                                           get_recent_context, get_session,
                                           get_session_info,
+                                          update_conversation_summary,
                                           update_session_activity)
+from app.utils.metrics import timed
 
 router = APIRouter()
 
 
+async def _resolve_session(session_id: Optional[str]) -> Tuple[UUID, bool]:
+    """
+    Get atau create session dari cookie.
+    
+    Returns:
+        Tuple (session_id, is_new): is_new True jika session baru dibuat
+    """
+    if session_id:
+        # Cek session exists
+        session = await get_session(UUID(session_id))
+        if session and session.get("is_active"):
+            current_session_id = UUID(session_id)
+            # Update last activity
+            await update_session_activity(current_session_id)
+            return current_session_id, False
+    
+    # Create new session jika belum ada atau invalid
+    new_session = await create_session()
+    return UUID(new_session["session_id"]), True
+
+
+def _set_session_cookie(response: Response, session_id: UUID) -> None:
+    response.set_cookie(
+        key="session_id",
+        value=str(session_id),
+        httponly=True,
+        max_age=86400 * 7,  # 7 days
+        samesite="lax"
+    )
+
+
+async def _get_cached_answer(
+    query: str,
+    search_results: list,
+    conversation_context: str,
+    config: AIConfigSnapshot
+) -> Optional[str]:
+    """Jawaban dari semantic cache; hanya untuk turn tanpa riwayat percakapan."""
+    if conversation_context:
+        return None
+    with timed("answer_cache_lookup"):
+        query_embedding = await embed_query_async(query)
+        return answer_cache.lookup(query_embedding, search_results, config.version)
+
+
+async def _save_cached_answer(
+    query: str,
+    search_results: list,
+    conversation_context: str,
+    config: AIConfigSnapshot,
+    answer: str
+) -> None:
+    if conversation_context or not answer or answer.startswith(ERROR_RESPONSE_PREFIX):
+        return
+    query_embedding = await embed_query_async(query)
+    answer_cache.store(query_embedding, search_results, answer, config.version)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _save_direct_exchange(session_id: UUID, query: str, answer: str) -> None:
+    """Simpan pertanyaan + balasan template (tanpa RAG/LLM) ke history."""
+    await add_message_to_history(session_id=session_id, role="user", message=query)
+    await add_message_to_history(session_id=session_id, role="assistant", message=answer)
+    await update_conversation_summary(session_id)
+
+
+async def _direct_event_stream(query: str, answer: str) -> AsyncIterator[str]:
+    yield _sse_event("token", {"text": answer})
+    yield _sse_event("done", {"question": query, "answer": answer})
+
+
+def _streaming_response(events: AsyncIterator[str], session_id: UUID, is_new_session: bool) -> StreamingResponse:
+    streaming_response = StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    if is_new_session:
+        _set_session_cookie(streaming_response, session_id)
+    return streaming_response
+
+
 @router.post("/", response_model=UserChatResponse)
-def user_chat_endpoint(
+async def user_chat_endpoint(
     request: UserChatRequest,
     response: Response,
     session_id: Optional[str] = Cookie(None, include_in_schema=False)
@@ -34,75 +132,184 @@ def user_chat_endpoint(
     """
     try:
         # 1. Get atau create session
-        current_session_id = None
-        
-        if session_id:
-            # Cek session exists
-            session = get_session(UUID(session_id))
-            if session and session.get("is_active"):
-                current_session_id = UUID(session_id)
-                # Update last activity
-                update_session_activity(current_session_id)
-        
-        # Create new session jika belum ada atau invalid
-        if not current_session_id:
-            new_session = create_session()
-            current_session_id = UUID(new_session["session_id"])
+        with timed("session_lookup"):
+            current_session_id, is_new_session = await _resolve_session(session_id)
+        if is_new_session:
             # Set cookie untuk session
-            response.set_cookie(
-                key="session_id",
-                value=str(current_session_id),
-                httponly=True,
-                max_age=86400 * 7,  # 7 days
-                samesite="lax"
-            )
+            _set_session_cookie(response, current_session_id)
+        
+        # Sapaan/basa-basi: balasan template tanpa riwayat, retrieval, dan LLM
+        small_talk_reply = get_small_talk_reply(request.query)
+        if small_talk_reply is not None:
+            await _save_direct_exchange(current_session_id, request.query, small_talk_reply)
+            return UserChatResponse(question=request.query, answer=small_talk_reply)
         
         # 2. Ambil conversation context (5 message terakhir)
-        conversation_context = get_recent_context(current_session_id, limit=5)
+        with timed("history_fetch"):
+            conversation_context = await get_recent_context(current_session_id, limit=5)
         
         # 3. Simpan user message ke history
-        add_message_to_history(
+        await add_message_to_history(
             session_id=current_session_id,
             role="user",
             message=request.query
         )
         
-        # 4. Get active RAG params dari AI config
-        active_params = get_active_rag_params()
+        # 4. Get active RAG params dari AI config (snapshot dipakai untuk RAG & LLM)
+        with timed("config_fetch"):
+            config = await get_config_snapshot_async()
+        active_params = get_active_rag_params(config)
         
         # 5. RAG: Search similar services
-        rag_result = rag_pipeline(
-            user_query=request.query,
-            top_k=active_params["top_k"],
-            similarity_threshold=active_params["min_similarity"]
-        )
+        with timed("rag"):
+            rag_result = await rag_pipeline(
+                user_query=request.query,
+                top_k=active_params["top_k"],
+                similarity_threshold=active_params["min_similarity"]
+            )
         
-        # 6. LLM: Generate response dengan history context
-        chat_result = chat_with_rag_and_history(
-            user_query=request.query,
-            search_results=rag_result["search_results"],
-            conversation_context=conversation_context
-        )
+        # 6. Jawaban template (di luar domain), langsung dari data layanan (fast path),
+        #    semantic cache, atau LLM
+        answer = get_no_match_reply(rag_result["search_results"], conversation_context)
+        if answer is None:
+            answer = await fast_path.try_answer(request.query, rag_result["search_results"])
+        if answer is None:
+            answer = await _get_cached_answer(
+                request.query, rag_result["search_results"], conversation_context, config
+            )
+        if answer is None:
+            chat_result = await chat_with_rag_and_history(
+                user_query=request.query,
+                search_results=rag_result["search_results"],
+                conversation_context=conversation_context,
+                config=config
+            )
+            answer = chat_result["response"]
+            await _save_cached_answer(
+                request.query, rag_result["search_results"], conversation_context, config, answer
+            )
         
         # 7. Simpan assistant response ke history
-        add_message_to_history(
+        await add_message_to_history(
             session_id=current_session_id,
             role="assistant",
-            message=chat_result["response"]
+            message=answer
         )
+        await update_conversation_summary(current_session_id, config)
         
         # 8. Return simple response (question + answer only, no session_id)
         return UserChatResponse(
             question=request.query,
-            answer=chat_result["response"]
+            answer=answer
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/stream")
+async def user_chat_stream_endpoint(
+    request: UserChatRequest,
+    session_id: Optional[str] = Cookie(None, include_in_schema=False)
+):
+    """
+    Versi streaming (Server-Sent Events) dari user chat endpoint.
+    - Event `token`: potongan jawaban ({"text": ...}) segera setelah dihasilkan model
+    - Event `done`: jawaban lengkap ({"question": ..., "answer": ...})
+    Jawaban lengkap tetap disimpan ke chat history di akhir stream.
+    """
+    try:
+        with timed("session_lookup"):
+            current_session_id, is_new_session = await _resolve_session(session_id)
+        
+        small_talk_reply = get_small_talk_reply(request.query)
+        if small_talk_reply is not None:
+            await _save_direct_exchange(current_session_id, request.query, small_talk_reply)
+            return _streaming_response(
+                _direct_event_stream(request.query, small_talk_reply), current_session_id, is_new_session
+            )
+        
+        with timed("history_fetch"):
+            conversation_context = await get_recent_context(current_session_id, limit=5)
+        
+        await add_message_to_history(
+            session_id=current_session_id,
+            role="user",
+            message=request.query
+        )
+        
+        with timed("config_fetch"):
+            config = await get_config_snapshot_async()
+        active_params = get_active_rag_params(config)
+        with timed("rag"):
+            rag_result = await rag_pipeline(
+                user_query=request.query,
+                top_k=active_params["top_k"],
+                similarity_threshold=active_params["min_similarity"]
+            )
+        direct_answer = get_no_match_reply(rag_result["search_results"], conversation_context)
+        if direct_answer is None:
+            direct_answer = await fast_path.try_answer(request.query, rag_result["search_results"])
+        if direct_answer is None:
+            direct_answer = await _get_cached_answer(
+                request.query, rag_result["search_results"], conversation_context, config
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    stream_failed = False
+    
+    async def generate() -> AsyncIterator[str]:
+        nonlocal stream_failed
+        if direct_answer is not None:
+            yield direct_answer
+            return
+        async for text in generate_response_with_history_stream(
+            user_query=request.query,
+            search_results=rag_result["search_results"],
+            conversation_context=conversation_context,
+            config=config
+        ):
+            # Error Gemini (juga di tengah stream) dikirim sebagai potongan teks tersendiri
+            if text.startswith(ERROR_RESPONSE_PREFIX):
+                stream_failed = True
+            yield text
+    
+    async def event_stream() -> AsyncIterator[str]:
+        parts = []
+        try:
+            async for text in generate():
+                parts.append(text)
+                yield _sse_event("token", {"text": text})
+        finally:
+            # Simpan jawaban (juga jika client memutus koneksi di tengah stream)
+            answer = "".join(parts)
+            if answer:
+                # Shield: saat client disconnect, stream ini sedang di-cancel
+                with anyio.CancelScope(shield=True):
+                    try:
+                        await add_message_to_history(
+                            session_id=current_session_id,
+                            role="assistant",
+                            message=answer
+                        )
+                        await update_conversation_summary(current_session_id, config)
+                    except Exception as e:
+                        print(f"Failed to save streamed answer: {e}")
+        
+        # Jawaban yang terpotong error tidak boleh masuk semantic cache
+        if direct_answer is None and not stream_failed:
+            await _save_cached_answer(
+                request.query, rag_result["search_results"], conversation_context, config, answer
+            )
+        
+        yield _sse_event("done", {"question": request.query, "answer": answer})
+    
+    return _streaming_response(event_stream(), current_session_id, is_new_session)
+
+
 @router.get("/history", response_model=ConversationHistoryResponse)
-def get_history_endpoint(
+async def get_history_endpoint(
     session_id: Optional[str] = Cookie(None, include_in_schema=False),
     limit: int = 10
 ):
@@ -117,12 +324,12 @@ def get_history_endpoint(
         session_uuid = UUID(session_id)
         
         # Verify session exists
-        session = get_session(session_uuid)
+        session = await get_session(session_uuid)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Get history
-        history = get_conversation_history(session_uuid, limit)
+        history = await get_conversation_history(session_uuid, limit)
         
         return ConversationHistoryResponse(
             session_id=session_uuid,
@@ -137,22 +344,16 @@ def get_history_endpoint(
 
 
 @router.post("/new-session", response_model=NewSessionResponse)
-def new_session_endpoint(response: Response):
+async def new_session_endpoint(response: Response):
     """
     Buat session baru (clear history, start fresh).
     """
     try:
-        new_session = create_session()
+        new_session = await create_session()
         session_id = new_session["session_id"]
         
         # Set cookie
-        response.set_cookie(
-            key="session_id",
-            value=session_id,
-            httponly=True,
-            max_age=86400 * 7,  # 7 days
-            samesite="lax"
-        )
+        _set_session_cookie(response, UUID(session_id))
         
         return NewSessionResponse(
             session_id=UUID(session_id),
@@ -164,7 +365,7 @@ def new_session_endpoint(response: Response):
 
 
 @router.delete("/session")
-def clear_session_endpoint(response: Response):
+async def clear_session_endpoint(response: Response):
     """
     Clear session cookie (logout/reset).
     """
@@ -173,7 +374,7 @@ def clear_session_endpoint(response: Response):
 
 
 @router.get("/session-info")
-def get_session_info_endpoint(
+async def get_session_info_endpoint(
     session_id: Optional[str] = Cookie(None, include_in_schema=False)
 ):
     """
@@ -184,7 +385,7 @@ def get_session_info_endpoint(
     
     try:
         session_uuid = UUID(session_id)
-        info = get_session_info(session_uuid)
+        info = await get_session_info(session_uuid)
         
         if not info:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -198,13 +399,13 @@ def get_session_info_endpoint(
 
 
 @router.get("/health")
-def health_check():
+async def health_check():
     """
     Health check endpoint untuk user chat service.
     """
     try:
         # Check if AI config is accessible
-        params = get_active_rag_params()
+        params = get_active_rag_params(await get_config_snapshot_async())
         
         return {
             "status": "healthy",
@@ -1,10 +1,68 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from supabase import create_client, Client
+import asyncio
 import os
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient, Client
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+class _LazyClient:
+    """
+    Proxy untuk sync Supabase client. Paket supabase (httpx, postgrest, realtime, ...)
+    baru di-import dan client baru dibuat saat atribut pertama kali diakses, sehingga
+    `from app.database.client import supabase` tidak memperlambat startup.
+    """
+
+    def __init__(self):
+        self._client: Optional["Client"] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> "Client":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client
+                    self._client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+supabase: "Client" = _LazyClient()
+
+# Async client untuk request path async (dibuat saat pertama dipakai)
+_async_supabase: Optional["AsyncClient"] = None
+_async_supabase_lock = asyncio.Lock()
+
+
+def get_supabase() -> "Client":
+    return supabase.get()
+
+
+async def get_async_supabase() -> "AsyncClient":
+    global _async_supabase
+    if _async_supabase is None:
+        async with _async_supabase_lock:
+            if _async_supabase is None:
+                from supabase import acreate_client
+                _async_supabase = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+    return _async_supabase
+
+
+def reset_clients() -> None:
+    """
+    Buang client yang sudah dibuat. Dipanggil di worker setelah fork (lihat
+    gunicorn.conf.py): koneksi HTTP milik master tidak boleh dipakai bersama.
+    """
+    global _async_supabase, _async_supabase_lock
+    supabase._client = None
+    _async_supabase = None
+    _async_supabase_lock = asyncio.Lock()
@@ -24,6 +24,8 @@ class KnowledgeBaseStats(BaseModel):
     embedding_coverage: float = Field(..., description="Persentase coverage embedding")
     top_categories: List[ServiceCategoryStats] = Field(..., description="Top 10 kategori layanan")
     last_updated: Optional[datetime] = Field(None, description="Last update timestamp")
+    generated_at: Optional[datetime] = Field(None, description="Waktu data section ini dihitung")
+    age_seconds: Optional[float] = Field(None, description="Umur data (detik) saat dikirim, dari cache dashboard")
 
 
 # ============================================
@@ -53,6 +55,36 @@ class ChatAnalytics(BaseModel):
     avg_messages_per_session: float = Field(..., description="Average messages per session")
     sessions_today: int = Field(..., description="New sessions created today")
     messages_today: int = Field(..., description="Messages sent today")
+    generated_at: Optional[datetime] = Field(None, description="Waktu data section ini dihitung")
+    age_seconds: Optional[float] = Field(None, description="Umur data (detik) saat dikirim, dari cache dashboard")
+
+
+class AnswerCacheStats(BaseModel):
+    """Statistik semantic answer cache"""
+    enabled: bool = Field(..., description="Apakah answer cache aktif")
+    size: int = Field(..., description="Jumlah jawaban tersimpan")
+    hits: int = Field(..., description="Jumlah pertanyaan yang dijawab dari cache")
+    misses: int = Field(..., description="Jumlah pertanyaan yang harus ke LLM")
+    hit_rate: Optional[float] = Field(None, description="hits / (hits + misses)")
+
+
+class FastPathStats(BaseModel):
+    """Statistik fast path (jawaban langsung dari data layanan tanpa LLM)"""
+    enabled: bool = Field(..., description="Apakah fast path aktif")
+    attempts: int = Field(..., description="Jumlah pertanyaan yang diperiksa fast path")
+    hits: int = Field(..., description="Jumlah pertanyaan yang dijawab tanpa LLM")
+    hit_rate: Optional[float] = Field(None, description="hits / attempts")
+    hits_by_intent: Dict[str, int] = Field(default_factory=dict, description="Hits per intent (persyaratan, biaya, ...)")
+    skipped: Dict[str, int] = Field(default_factory=dict, description="Jumlah pertanyaan yang diteruskan ke LLM per alasan")
+
+
+class IntentRouterStats(BaseModel):
+    """Statistik intent router (balasan template untuk basa-basi dan pertanyaan di luar domain)"""
+    enabled: bool = Field(..., description="Apakah intent router aktif")
+    small_talk: int = Field(..., description="Jumlah pesan basa-basi yang dijawab template")
+    small_talk_rate: Optional[float] = Field(None, description="small_talk / semua pesan yang diklasifikasi")
+    small_talk_by_intent: Dict[str, int] = Field(default_factory=dict, description="Jumlah per intent (greeting, thanks, ...)")
+    out_of_domain: int = Field(..., description="Jumlah pertanyaan tanpa layanan yang cocok yang dijawab template")
 
 
 # ============================================
@@ -75,6 +107,15 @@ class LLMHealth(BaseModel):
     error: Optional[str] = Field(None, description="Error message jika unhealthy")
 
 
+class StageLatency(BaseModel):
+    """Latency satu stage request (dari histogram in-process)"""
+    count: int = Field(..., description="Jumlah sampel sejak proses start")
+    mean_ms: Optional[float] = Field(None, description="Rata-rata latency (ms)")
+    p50_ms: Optional[float] = Field(None, description="Median latency sampel terbaru (ms)")
+    p95_ms: Optional[float] = Field(None, description="p95 latency sampel terbaru (ms)")
+    p99_ms: Optional[float] = Field(None, description="p99 latency sampel terbaru (ms)")
+
+
 class SystemHealth(BaseModel):
     """Overall system health check"""
     overall_status: str = Field(..., description="'healthy', 'degraded', or 'unhealthy'")
@@ -82,6 +123,10 @@ class SystemHealth(BaseModel):
     llm: LLMHealth = Field(..., description="LLM service health status")
     embedding_service: str = Field(..., description="Embedding service status")
     uptime: Optional[str] = Field(None, description="System uptime")
+    uptime_seconds: Optional[float] = Field(None, description="Process uptime dalam detik")
+    latency: Dict[str, StageLatency] = Field(default_factory=dict, description="Latency per stage request")
+    generated_at: Optional[datetime] = Field(None, description="Waktu data section ini dihitung")
+    age_seconds: Optional[float] = Field(None, description="Umur data (detik) saat dikirim, dari cache dashboard")
 
 
 # ============================================
@@ -94,4 +139,8 @@ class AdminDashboard(BaseModel):
     ai_config: AIConfigStatus = Field(..., description="Current AI configuration")
     chat_analytics: ChatAnalytics = Field(..., description="Chat analytics and metrics")
     system_health: SystemHealth = Field(..., description="System health status")
+    answer_cache: Optional[AnswerCacheStats] = Field(None, description="Semantic answer cache statistics")
+    fast_path: Optional[FastPathStats] = Field(None, description="Fast path (tanpa LLM) statistics")
+    intent_router: Optional[IntentRouterStats] = Field(None, description="Intent router (basa-basi) statistics")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Error per section yang gagal atau timeout")
     generated_at: datetime = Field(default_factory=datetime.now, description="Dashboard generation timestamp")
@@ -1,6 +1,51 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
-from app.database.client import supabase
+from app.database.client import get_async_supabase, supabase
+
+# Berapa lama (detik) snapshot config dipakai ulang sebelum dibaca lagi dari database
+AI_CONFIG_CACHE_TTL = float(os.getenv("AI_CONFIG_CACHE_TTL", "30"))
+
+
+@dataclass(frozen=True)
+class AIConfigSnapshot:
+    """
+    Snapshot read-only dari tabel ai_config.
+    `version` naik setiap kali isi config berubah, sehingga cache lain
+    (model Gemini, jawaban, dsb) bisa tahu kapan harus dibangun ulang.
+    """
+    values: Dict[str, str]
+    version: int
+    fetched_at: float
+
+    @property
+    def gemini_api_key(self) -> str:
+        return self.values.get("gemini_api_key") or ""
+
+    @property
+    def top_k(self) -> int:
+        return int(self.values.get("top_k", 5))
+
+    @property
+    def min_similarity(self) -> float:
+        return float(self.values.get("min_similarity", 0.5))
+
+    @property
+    def temperature(self) -> float:
+        return float(self.values.get("temperature", 0.7))
+
+    @property
+    def max_tokens(self) -> int:
+        return int(self.values.get("max_tokens", 1024))
+
+
+_snapshot_lock = threading.Lock()
+_snapshot: Optional[AIConfigSnapshot] = None
+_snapshot_version = 0
+_invalidation_count = 0
 
 
 def get_all_configs() -> Dict[str, str]:
@@ -14,6 +59,72 @@ def get_all_configs() -> Dict[str, str]:
     return configs
 
 
+def _get_fresh_snapshot() -> Optional[AIConfigSnapshot]:
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.fetched_at < AI_CONFIG_CACHE_TTL:
+        return snapshot
+    return None
+
+
+def _store_snapshot(values: Dict[str, str], invalidation_count: int) -> AIConfigSnapshot:
+    global _snapshot, _snapshot_version
+    
+    with _snapshot_lock:
+        previous = _snapshot
+        if previous is None or previous.values != values:
+            _snapshot_version += 1
+        snapshot = AIConfigSnapshot(values=values, version=_snapshot_version, fetched_at=time.monotonic())
+        # Jangan simpan hasil baca yang mungkin sudah basi karena ada update di tengah jalan
+        if invalidation_count == _invalidation_count:
+            _snapshot = snapshot
+    
+    return snapshot
+
+
+def get_config_snapshot(force_refresh: bool = False) -> AIConfigSnapshot:
+    """
+    Ambil snapshot config, dibaca dari database paling banyak sekali per TTL.
+    
+    Args:
+        force_refresh: Abaikan cache dan baca ulang dari database
+        
+    Returns:
+        AIConfigSnapshot
+    """
+    snapshot = None if force_refresh else _get_fresh_snapshot()
+    if snapshot is not None:
+        return snapshot
+    
+    invalidation_count = _invalidation_count
+    return _store_snapshot(get_all_configs(), invalidation_count)
+
+
+async def get_config_snapshot_async(force_refresh: bool = False) -> AIConfigSnapshot:
+    """Versi async dari get_config_snapshot (berbagi cache yang sama)."""
+    snapshot = None if force_refresh else _get_fresh_snapshot()
+    if snapshot is not None:
+        return snapshot
+    
+    invalidation_count = _invalidation_count
+    return _store_snapshot(await get_all_configs_async(), invalidation_count)
+
+
+def invalidate_config_cache() -> None:
+    """Buang snapshot config; request berikutnya membaca ulang dari database."""
+    global _snapshot, _invalidation_count
+    
+    with _snapshot_lock:
+        _snapshot = None
+        _invalidation_count += 1
+
+
+async def get_all_configs_async() -> Dict[str, str]:
+    db = await get_async_supabase()
+    result = await db.table("ai_config").select("config_key, config_value").execute()
+    
+    return {item["config_key"]: item["config_value"] for item in result.data or []}
+
+
 def get_config(key: str) -> Optional[str]:
     result = supabase.table("ai_config").select("config_value").eq("config_key", key).execute()
     
@@ -33,6 +144,7 @@ def update_config(key: str, value: str, updated_by: Optional[str] = None) -> boo
         update_data["updated_by"] = updated_by
     
     result = supabase.table("ai_config").update(update_data).eq("config_key", key).execute()
+    invalidate_config_cache()
     
     return bool(result.data)
 
@@ -65,25 +177,26 @@ def update_multiple_configs(updates: Dict[str, Any], updated_by: Optional[str] =
     return results
 
 
-def get_active_gemini_key() -> str:
-    return get_config("gemini_api_key") or ""
+def get_active_gemini_key(config: Optional[AIConfigSnapshot] = None) -> str:
+    config = config or get_config_snapshot()
+    return config.gemini_api_key
 
 
-def get_active_rag_params() -> Dict[str, Any]:
-    """Get active RAG parameters dari database."""
-    configs = get_all_configs()
+def get_active_rag_params(config: Optional[AIConfigSnapshot] = None) -> Dict[str, Any]:
+    """Get active RAG parameters dari snapshot config."""
+    config = config or get_config_snapshot()
     
     return {
-        "top_k": int(configs.get("top_k", 5)),
-        "min_similarity": float(configs.get("min_similarity", 0.5))
+        "top_k": config.top_k,
+        "min_similarity": config.min_similarity
     }
 
 
-def get_active_llm_params() -> Dict[str, Any]:
-    """Get active LLM generation parameters dari database."""
-    configs = get_all_configs()
+def get_active_llm_params(config: Optional[AIConfigSnapshot] = None) -> Dict[str, Any]:
+    """Get active LLM generation parameters dari snapshot config."""
+    config = config or get_config_snapshot()
     
     return {
-        "temperature": float(configs.get("temperature", 0.7)),
-        "max_tokens": int(configs.get("max_tokens", 1024))
+        "temperature": config.temperature,
+        "max_tokens": config.max_tokens
     }
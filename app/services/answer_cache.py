@@ -0,0 +1,147 @@
+"""
+Semantic cache untuk jawaban chatbot.
+
+Jawaban disimpan bersama embedding pertanyaan, service_id hasil retrieval,
+dan versi AI config. Pertanyaan baru mendapat jawaban dari cache jika
+cosine similarity-nya dengan pertanyaan tersimpan >= threshold, layanan
+yang ditemukan sama persis, dan AI config belum berubah. Hanya dipakai
+untuk turn tanpa riwayat percakapan.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+
+_lock = threading.Lock()
+_entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+_next_id = 0
+# (entry_ids, matrix) untuk pencarian; dibangun ulang hanya setelah ada perubahan
+_search_matrix: Optional[tuple] = None
+_hits = 0
+_misses = 0
+
+
+def _service_key(search_results: List[Dict[str, Any]]) -> frozenset:
+    return frozenset(str(result.get("service_id")) for result in search_results)
+
+
+def _remove_entries(entry_ids: Iterable[int]) -> None:
+    """Harus dipanggil sambil memegang _lock."""
+    global _search_matrix
+
+    removed = False
+    for entry_id in list(entry_ids):
+        if _entries.pop(entry_id, None) is not None:
+            removed = True
+    if removed:
+        _search_matrix = None
+
+
+def lookup(
+    query_embedding: np.ndarray,
+    search_results: List[Dict[str, Any]],
+    config_version: int
+) -> Optional[str]:
+    """
+    Cari jawaban tersimpan untuk pertanyaan yang mirip.
+
+    Returns:
+        str jawaban dari cache, atau None jika tidak ada yang cocok
+    """
+    global _search_matrix, _hits, _misses
+
+    if not ANSWER_CACHE_ENABLED:
+        return None
+
+    service_key = _service_key(search_results)
+    now = time.monotonic()
+
+    with _lock:
+        if _search_matrix is None and _entries:
+            entry_ids = list(_entries.keys())
+            matrix = np.vstack([_entries[entry_id]["embedding"] for entry_id in entry_ids])
+            _search_matrix = (entry_ids, matrix)
+
+        if _search_matrix is not None:
+            entry_ids, matrix = _search_matrix
+            scores = matrix @ query_embedding
+            expired = []
+            for idx in np.argsort(-scores):
+                if scores[idx] < ANSWER_CACHE_SIMILARITY:
+                    break
+                entry = _entries[entry_ids[idx]]
+                if entry["expires_at"] < now or entry["config_version"] != config_version:
+                    expired.append(entry_ids[idx])
+                    continue
+                if entry["service_key"] == service_key:
+                    _entries.move_to_end(entry_ids[idx])
+                    _remove_entries(expired)
+                    _hits += 1
+                    return entry["answer"]
+            _remove_entries(expired)
+
+        _misses += 1
+        return None
+
+
+def store(
+    query_embedding: np.ndarray,
+    search_results: List[Dict[str, Any]],
+    answer: str,
+    config_version: int
+) -> None:
+    """Simpan jawaban untuk pertanyaan ini."""
+    global _next_id, _search_matrix
+
+    if not ANSWER_CACHE_ENABLED or ANSWER_CACHE_SIZE <= 0:
+        return
+
+    with _lock:
+        _entries[_next_id] = {
+            "embedding": np.asarray(query_embedding, dtype=np.float32),
+            "service_key": _service_key(search_results),
+            "answer": answer,
+            "config_version": config_version,
+            "expires_at": time.monotonic() + ANSWER_CACHE_TTL
+        }
+        _next_id += 1
+        while len(_entries) > ANSWER_CACHE_SIZE:
+            _entries.popitem(last=False)
+        _search_matrix = None
+
+
+def invalidate_services(service_ids: Iterable[str]) -> None:
+    """Buang jawaban yang dibangun dari layanan yang berubah atau dihapus."""
+    service_ids = {str(service_id) for service_id in service_ids}
+    with _lock:
+        _remove_entries(
+            entry_id for entry_id, entry in _entries.items()
+            if entry["service_key"] & service_ids
+        )
+
+
+def clear() -> None:
+    global _search_matrix
+
+    with _lock:
+        _entries.clear()
+        _search_matrix = None
+
+
+def get_stats() -> Dict[str, Any]:
+    total = _hits + _misses
+    return {
+        "enabled": ANSWER_CACHE_ENABLED,
+        "size": len(_entries),
+        "hits": _hits,
+        "misses": _misses,
+        "hit_rate": round(_hits / total, 4) if total else None
+    }
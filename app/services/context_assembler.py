@@ -0,0 +1,225 @@
+"""
+Susun konteks prompt LLM dalam batas token.
+
+Hasil RAG diproses dari yang paling relevan. Konten setiap layanan dipecah
+per kalimat (satu field layanan, mis. "biaya: gratis."); kalimat yang sama
+persis atau hampir sama dengan kalimat yang sudah masuk (mis. blok informasi
+pengaduan yang diulang di banyak layanan) dibuang. Jika konten masih melebihi
+jatah token per layanan, kalimat yang paling banyak memuat kata pertanyaan
+(selain nama layanan, mis. "biaya", "persyaratan") dipilih lebih dulu, dengan
+urutan asli tetap dipertahankan. Riwayat percakapan dipotong dari yang paling
+lama.
+
+Jumlah token hanya diperkirakan (~4 karakter per token), cukup untuk
+membatasi ukuran prompt tanpa memanggil tokenizer Gemini.
+"""
+import os
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+# Total token untuk konteks layanan, dan jatah maksimum per layanan (0 = tanpa batas)
+PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "1500"))
+PROMPT_SERVICE_TOKENS = int(os.getenv("PROMPT_SERVICE_TOKENS", "600"))
+# Token untuk riwayat percakapan (0 = tanpa batas)
+PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "400"))
+# Jaccard kata minimum agar dua segmen dianggap duplikat
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.85"))
+
+# Segmen pendek (mis. "biaya: gratis.") sah muncul di banyak layanan; hanya segmen
+# dengan kata sebanyak ini atau lebih yang diperiksa duplikat (sama persis atau mirip)
+_MIN_DUPLICATE_WORDS = 6
+# Sisa jatah di bawah ini tidak dipakai untuk memotong segmen berikutnya
+_MIN_SEGMENT_TOKENS = 20
+
+# Pisah setelah titik akhir kalimat, bukan penomoran daftar ("4. fotocopy ktp")
+_SEGMENT_SPLIT = re.compile(r"(?<=\D\.)\s+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Perkiraan jumlah token (~4 karakter per token)."""
+    return (len(text) + 3) // 4
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _split_segments(content: str) -> List[str]:
+    return [segment for segment in _SEGMENT_SPLIT.split(content.strip()) if segment]
+
+
+def _segments_tokens(segments: List[str]) -> int:
+    return estimate_tokens(" ".join(segments))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Potong di batas kata agar muat dalam max_tokens."""
+    max_chars = max_tokens * 4 - 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return f"{cut} ..."
+
+
+class _DuplicateFilter:
+    """Ingat segmen yang sudah masuk konteks untuk mendeteksi duplikat lintas layanan."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._exact: Set[str] = set()
+        self._word_sets: List[Set[str]] = []
+
+    def is_duplicate(self, segment: str) -> bool:
+        words = _words(segment)
+        if len(words) < _MIN_DUPLICATE_WORDS:
+            return False
+        if " ".join(words) in self._exact:
+            return True
+        if self.threshold > 1:
+            return False
+        word_set = set(words)
+        for seen in self._word_sets:
+            overlap = len(word_set & seen)
+            if overlap and overlap / len(word_set | seen) >= self.threshold:
+                return True
+        return False
+
+    def add(self, segment: str) -> None:
+        words = _words(segment)
+        if len(words) >= _MIN_DUPLICATE_WORDS:
+            self._exact.add(" ".join(words))
+            self._word_sets.append(set(words))
+
+
+def _select_segments(segments: List[str], query_words: Set[str], max_tokens: int) -> List[str]:
+    """
+    Pilih segmen yang muat dalam max_tokens. Segmen pertama (nama layanan) selalu
+    diprioritaskan, sisanya diurutkan berdasarkan jumlah kata pertanyaan yang
+    dimuat. Kata dari nama layanan diabaikan karena cocok dengan hampir semua
+    segmen. Hasil dikembalikan dalam urutan asli.
+    """
+    intent_words = (query_words - set(_words(segments[0]))) or query_words
+
+    def priority(idx: int) -> Tuple[int, int]:
+        if idx == 0:
+            return (-len(intent_words) - 1, idx)
+        return (-len(intent_words.intersection(_words(segments[idx]))), idx)
+
+    chosen: Dict[int, str] = {}
+    remaining = max_tokens
+    for idx in sorted(range(len(segments)), key=priority):
+        cost = estimate_tokens(segments[idx]) + 1
+        if cost <= remaining:
+            chosen[idx] = segments[idx]
+            remaining -= cost
+        elif remaining >= _MIN_SEGMENT_TOKENS:
+            chosen[idx] = truncate_tokens(segments[idx], remaining)
+            remaining = 0
+        if remaining < _MIN_SEGMENT_TOKENS:
+            break
+    return [chosen[idx] for idx in sorted(chosen)]
+
+
+def assemble_service_context(
+    user_query: str,
+    search_results: List[Dict[str, Any]],
+    budget_tokens: int = None,
+    service_tokens: int = None,
+    duplicate_threshold: float = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Pilih isi konteks layanan untuk prompt.
+
+    Args:
+        user_query: Pertanyaan user (untuk memilih segmen yang relevan)
+        search_results: Hasil RAG (service_id, content, similarity)
+        budget_tokens: Total token konteks (default PROMPT_CONTEXT_TOKENS, 0 = tanpa batas)
+        service_tokens: Jatah token per layanan (default PROMPT_SERVICE_TOKENS, 0 = tanpa batas)
+        duplicate_threshold: Jaccard minimum untuk near-duplicate (default CONTEXT_DUPLICATE_THRESHOLD)
+
+    Returns:
+        tuple: (hasil dengan `content` yang sudah dipangkas, urut relevansi; statistik token)
+    """
+    budget = PROMPT_CONTEXT_TOKENS if budget_tokens is None else budget_tokens
+    per_service = PROMPT_SERVICE_TOKENS if service_tokens is None else service_tokens
+    duplicates = _DuplicateFilter(CONTEXT_DUPLICATE_THRESHOLD if duplicate_threshold is None else duplicate_threshold)
+    query_words = set(_words(user_query))
+
+    stats = {
+        "context_tokens_original": 0,
+        "context_tokens": 0,
+        "duplicate_tokens_dropped": 0,
+        "services_included": 0,
+        "services_dropped": 0
+    }
+    remaining = budget if budget > 0 else None
+    assembled = []
+
+    ranked = sorted(search_results, key=lambda result: result.get("similarity") or 0, reverse=True)
+    for result in ranked:
+        content = result.get("content") or ""
+        stats["context_tokens_original"] += estimate_tokens(content)
+
+        if remaining is not None and remaining < _MIN_SEGMENT_TOKENS:
+            stats["services_dropped"] += 1
+            continue
+
+        segments = []
+        for segment in _split_segments(content):
+            if duplicates.is_duplicate(segment):
+                stats["duplicate_tokens_dropped"] += estimate_tokens(segment) + 1
+            else:
+                segments.append(segment)
+        if not segments:
+            stats["services_dropped"] += 1
+            continue
+
+        allowance = min(
+            remaining if remaining is not None else float("inf"),
+            per_service if per_service > 0 else float("inf")
+        )
+        if _segments_tokens(segments) > allowance:
+            segments = _select_segments(segments, query_words, int(allowance))
+
+        for segment in segments:
+            duplicates.add(segment)
+
+        text = " ".join(segments)
+        tokens = estimate_tokens(text)
+        stats["context_tokens"] += tokens
+        stats["services_included"] += 1
+        if remaining is not None:
+            remaining -= tokens
+        assembled.append({**result, "content": text})
+
+    return assembled, stats
+
+
+def trim_conversation_context(conversation_context: str, budget_tokens: int = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Potong riwayat percakapan agar muat dalam budget, menyimpan baris terbaru.
+
+    Returns:
+        tuple: (riwayat terpotong, statistik token)
+    """
+    budget = PROMPT_HISTORY_TOKENS if budget_tokens is None else budget_tokens
+    original = estimate_tokens(conversation_context)
+    if budget <= 0 or original <= budget:
+        return conversation_context, {"history_tokens_original": original, "history_tokens": original}
+
+    kept: List[str] = []
+    remaining = budget
+    for line in reversed(conversation_context.splitlines()):
+        cost = estimate_tokens(line) + 1
+        if cost <= remaining:
+            kept.append(line)
+            remaining -= cost
+            continue
+        if not kept and remaining >= _MIN_SEGMENT_TOKENS:
+            # Baris terakhir saja sudah melebihi budget: simpan awalnya (label pembicara)
+            kept.append(truncate_tokens(line, remaining))
+        break
+
+    trimmed = "\n".join(reversed(kept))
+    return trimmed, {"history_tokens_original": original, "history_tokens": estimate_tokens(trimmed)}
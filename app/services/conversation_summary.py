@@ -0,0 +1,114 @@
+"""
+Ringkasan percakapan bergulir (rolling summary) per session.
+
+Prompt membawa ringkasan semua pertukaran sebelumnya plus hanya satu
+pertukaran terakhir apa adanya. Setelah setiap turn, pertukaran yang tadinya
+"terakhir" dilipat ke ringkasan: satu baris per pertukaran berisi pertanyaan
+pengguna dan kalimat jawaban yang paling relevan dengan pertanyaan itu.
+Jika ringkasan melebihi CONVERSATION_SUMMARY_TOKENS, baris tertua dipadatkan
+(hanya pertanyaan) lalu dibuang, sehingga ukurannya tetap terbatas berapa pun
+panjang session.
+"""
+import os
+import re
+from typing import List, Set
+
+from app.services.context_assembler import estimate_tokens, truncate_tokens
+
+# extractive (default), llm (ringkasan oleh Gemini, fallback extractive), off (replay N pesan mentah)
+CONVERSATION_SUMMARY_MODE = os.getenv("CONVERSATION_SUMMARY_MODE", "extractive").lower()
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "200"))
+# Batas jawaban asisten pada pertukaran terakhir yang ikut apa adanya di prompt
+CONVERSATION_LAST_ANSWER_TOKENS = int(os.getenv("CONVERSATION_LAST_ANSWER_TOKENS", "150"))
+
+_QUESTION_TOKENS = 40
+_LAST_QUESTION_TOKENS = 100
+_ANSWER_TOKENS = 60
+_ANSWER_SEPARATOR = " | Asisten: "
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_MARKDOWN = re.compile(r"[*_#`>]+|^\s*[-•]\s*|^\s*\d+\.\s+", re.MULTILINE)
+_WORD = re.compile(r"[a-z0-9]+")
+# Kalimat pembuka/penutup basa-basi yang tidak membawa informasi
+_FILLER_PREFIXES = (
+    "halo", "hai", "tentu", "baik", "terima kasih", "semoga", "apakah ada",
+    "jika ada", "jika anda", "silakan", "ada lagi", "senang"
+)
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\s+", " ", _MARKDOWN.sub("", text or "")).strip()
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def _key_sentences(answer: str, question: str, max_tokens: int = _ANSWER_TOKENS) -> str:
+    """Kalimat jawaban yang paling banyak memuat kata pertanyaan, dalam urutan asli."""
+    sentences = [
+        sentence for sentence in (_clean(part) for part in _SENTENCE_SPLIT.split(answer or ""))
+        if sentence and not sentence.lower().startswith(_FILLER_PREFIXES)
+    ]
+    if not sentences:
+        return truncate_tokens(_clean(answer), max_tokens)
+
+    question_words = _words(question)
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda idx: (-len(question_words & _words(sentences[idx])), idx)
+    )
+    chosen: List[int] = []
+    remaining = max_tokens
+    for idx in ranked:
+        cost = estimate_tokens(sentences[idx]) + 1
+        if cost > remaining:
+            if not chosen:
+                return truncate_tokens(sentences[idx], max_tokens)
+            break
+        chosen.append(idx)
+        remaining -= cost
+    return " ".join(sentences[idx] for idx in sorted(chosen))
+
+
+def summarize_exchange(user_message: str, assistant_message: str) -> str:
+    """Satu baris ringkasan untuk satu pertukaran pengguna-asisten."""
+    question = truncate_tokens(_clean(user_message), _QUESTION_TOKENS)
+    answer = _key_sentences(assistant_message, user_message)
+    return f"- Pengguna: {question}{_ANSWER_SEPARATOR}{answer}"
+
+
+def bound_summary(summary: str, max_tokens: int = None) -> str:
+    """
+    Batasi ringkasan ke max_tokens: baris tertua dipadatkan menjadi pertanyaannya
+    saja, lalu dibuang jika masih terlalu panjang.
+    """
+    max_tokens = CONVERSATION_SUMMARY_TOKENS if max_tokens is None else max_tokens
+    lines = [line for line in (summary or "").splitlines() if line.strip()]
+
+    idx = 0
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        if idx < len(lines) - 1 and _ANSWER_SEPARATOR in lines[idx]:
+            lines[idx] = lines[idx].split(_ANSWER_SEPARATOR, 1)[0]
+            idx += 1
+        else:
+            lines.pop(0)
+            idx = max(0, idx - 1)
+
+    text = "\n".join(lines)
+    return truncate_tokens(text, max_tokens) if estimate_tokens(text) > max_tokens else text
+
+
+def fold_exchange(summary: str, user_message: str, assistant_message: str, max_tokens: int = None) -> str:
+    """Tambahkan satu pertukaran ke ringkasan (extractive), tetap dalam batas token."""
+    line = summarize_exchange(user_message, assistant_message)
+    return bound_summary(f"{summary}\n{line}" if summary else line, max_tokens)
+
+
+def format_last_question(user_message: str) -> str:
+    return truncate_tokens(_clean(user_message), _LAST_QUESTION_TOKENS)
+
+
+def format_last_answer(assistant_message: str) -> str:
+    """Jawaban asisten pada pertukaran terakhir, dipotong ke CONVERSATION_LAST_ANSWER_TOKENS."""
+    return truncate_tokens(_clean(assistant_message), CONVERSATION_LAST_ANSWER_TOKENS)
@@ -1,15 +1,131 @@
 """
 Service untuk generate admin dashboard metrics.
+
+Query yang saling independen dijalankan bersamaan lewat async Supabase client,
+dibatasi DASHBOARD_QUERY_CONCURRENCY query sekaligus dan DASHBOARD_QUERY_TIMEOUT
+detik per query. Section yang gagal atau timeout mengembalikan nilai default
+beserta error, section lain tetap dikembalikan.
+
+Hasil per section di-cache dengan stale-while-revalidate: setelah TTL section
+habis, nilai terakhir tetap langsung dikembalikan sementara refresh berjalan
+di background. Hasil section yang gagal tidak di-cache, jadi request berikutnya
+langsung mencoba lagi.
 """
+import asyncio
+import functools
+import os
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.database.client import get_async_supabase
+from app.services import answer_cache, fast_path, intent_service
+from app.services.ai_config_service import get_config_snapshot_async
+from app.utils import metrics
+
+DASHBOARD_QUERY_CONCURRENCY = int(os.getenv("DASHBOARD_QUERY_CONCURRENCY", "6"))
+DASHBOARD_QUERY_TIMEOUT = float(os.getenv("DASHBOARD_QUERY_TIMEOUT", "5"))
+
+_query_semaphore = asyncio.Semaphore(DASHBOARD_QUERY_CONCURRENCY)
+
+# TTL (detik) per section sebelum di-refresh di background
+DASHBOARD_SECTION_TTL = {
+    "knowledge_base": float(os.getenv("DASHBOARD_KNOWLEDGE_BASE_TTL", "300")),
+    "chat_analytics": float(os.getenv("DASHBOARD_CHAT_ANALYTICS_TTL", "60")),
+    "system_health": float(os.getenv("DASHBOARD_SYSTEM_HEALTH_TTL", "30"))
+}
+
+_section_lock = threading.Lock()
+# section -> {"value": dict, "generated_at": datetime, "fetched_at": float}
+_section_cache: Dict[str, Dict[str, Any]] = {}
+# section -> task yang sedang menghitung ulang (dipakai bersama oleh request lain)
+_section_refresh: Dict[str, asyncio.Task] = {}
+_section_generation: Dict[str, int] = {}
+
+
+async def _execute(query) -> Any:
+    """Jalankan satu query dengan batas concurrency dan timeout."""
+    async with _query_semaphore:
+        return await asyncio.wait_for(query.execute(), DASHBOARD_QUERY_TIMEOUT)
+
+
+async def _count(query) -> int:
+    """Jalankan query count="exact", head=True (hanya jumlah baris, tanpa data)."""
+    response = await _execute(query)
+    return response.count if response.count else 0
 
-from app.database.client import supabase
-from app.services.ai_config_service import get_all_configs
 
+def _error_message(e: Exception) -> str:
+    if isinstance(e, asyncio.TimeoutError):
+        return f"Query timeout setelah {DASHBOARD_QUERY_TIMEOUT} detik"
+    return str(e) or type(e).__name__
 
-def get_knowledge_base_stats() -> Dict:
+
+def invalidate_dashboard_cache(section: Optional[str] = None) -> None:
+    """
+    Buang cache section dashboard (None = semua section).
+    Aman dipanggil dari thread mana pun (mis. endpoint CRUD yang sync).
+    """
+    with _section_lock:
+        for name in [section] if section else list(DASHBOARD_SECTION_TTL):
+            _section_cache.pop(name, None)
+            _section_generation[name] = _section_generation.get(name, 0) + 1
+
+
+async def _refresh_section(name: str, compute: Callable[[], Awaitable[Dict]]) -> Dict[str, Any]:
+    generation = _section_generation.get(name, 0)
+    value = await compute()
+    entry = {"value": value, "generated_at": datetime.now(), "fetched_at": time.monotonic()}
+    
+    with _section_lock:
+        # Hasil yang gagal tidak disimpan: nilai terakhir yang berhasil tetap dipakai,
+        # atau (cache masih kosong) request berikutnya mencoba lagi. Hasil yang
+        # dihitung sebelum invalidasi juga tidak disimpan
+        if generation == _section_generation.get(name, 0) and not value.get("error"):
+            _section_cache[name] = entry
+    return entry
+
+
+def _start_refresh(name: str, compute: Callable[[], Awaitable[Dict]]) -> asyncio.Task:
+    task = _section_refresh.get(name)
+    if task is None or task.done():
+        task = asyncio.ensure_future(_refresh_section(name, compute))
+        _section_refresh[name] = task
+    return task
+
+
+def _with_age(entry: Dict[str, Any]) -> Dict:
+    return {
+        **entry["value"],
+        "generated_at": entry["generated_at"].isoformat(),
+        "age_seconds": round(time.monotonic() - entry["fetched_at"], 3)
+    }
+
+
+def _swr_cached(name: str):
+    """
+    Cache hasil fungsi section dengan stale-while-revalidate.
+    Fungsi asli tetap bisa dipanggil tanpa cache lewat `.uncached`.
+    """
+    def decorator(compute: Callable[[], Awaitable[Dict]]):
+        @functools.wraps(compute)
+        async def wrapper() -> Dict:
+            entry = _section_cache.get(name)
+            if entry is None:
+                # Belum ada nilai: tunggu refresh (request bersamaan berbagi satu refresh)
+                entry = await asyncio.shield(_start_refresh(name, compute))
+            elif time.monotonic() - entry["fetched_at"] >= DASHBOARD_SECTION_TTL[name]:
+                _start_refresh(name, compute)
+            return _with_age(entry)
+        
+        wrapper.uncached = compute
+        return wrapper
+    return decorator
+
+
+@_swr_cached("knowledge_base")
+async def get_knowledge_base_stats() -> Dict:
     """
     Get statistics tentang knowledge base layanan.
     
@@ -17,23 +133,21 @@ def get_knowledge_base_stats() -> Dict:
         Dict dengan total services, embedding coverage, top categories
     """
     try:
-        # Get total services
-        services_response = supabase.table("services").select("id", count="exact").execute()
-        total_services = services_response.count if services_response.count else 0
+        db = await get_async_supabase()
         
-        # Get total embedded services
-        embeddings_response = supabase.table("service_embeddings").select("service_id", count="exact").execute()
-        total_embedded = embeddings_response.count if embeddings_response.count else 0
+        # Total services, total embedded services, dan kategori diambil bersamaan
+        total_services, total_embedded, services_data = await asyncio.gather(
+            _count(db.table("services").select("id", count="exact", head=True)),
+            _count(db.table("service_embeddings").select("service_id", count="exact", head=True)),
+            _execute(db.table("services").select("instansi_penyelenggara"))
+        )
         
         # Calculate embedding coverage
         embedding_coverage = (total_embedded / total_services * 100) if total_services > 0 else 0
         
-        # Get top categories (by instansi_penyelenggara)
-        services_data = supabase.table("services").select("instansi_penyelenggara").execute()
-        
-        # Count by category
+        # Count by category (by instansi_penyelenggara)
         category_counts = {}
-        for service in services_data.data:
+        for service in services_data.data or []:
             category = service.get("instansi_penyelenggara", "Unknown")
             category_counts[category] = category_counts.get(category, 0) + 1
         
@@ -56,7 +170,7 @@ def get_knowledge_base_stats() -> Dict:
             "top_categories": top_categories,
             "last_updated": datetime.now().isoformat()
         }
-        
+    
     except Exception as e:
         return {
             "total_services": 0,
@@ -64,11 +178,11 @@ def get_knowledge_base_stats() -> Dict:
             "embedding_coverage": 0,
             "top_categories": [],
             "last_updated": None,
-            "error": str(e)
+            "error": _error_message(e)
         }
 
 
-def get_ai_config_status() -> Dict:
+async def get_ai_config_status() -> Dict:
     """
     Get current AI configuration status.
     
@@ -76,18 +190,17 @@ def get_ai_config_status() -> Dict:
         Dict dengan AI config settings
     """
     try:
-        configs = get_all_configs()
-        
-        gemini_key = configs.get("gemini_api_key", {}).get("config_value")
+        config = await asyncio.wait_for(get_config_snapshot_async(), DASHBOARD_QUERY_TIMEOUT)
+        gemini_key = config.gemini_api_key
         
         return {
             "gemini_api_configured": bool(gemini_key and gemini_key.strip()),
-            "top_k": int(configs.get("top_k", {}).get("config_value", 3)),
-            "min_similarity": float(configs.get("min_similarity", {}).get("config_value", 0.3)),
-            "temperature": float(configs.get("temperature", {}).get("config_value", 0.7)),
-            "max_tokens": int(configs.get("max_tokens", {}).get("config_value", 1024))
+            "top_k": config.top_k,
+            "min_similarity": config.min_similarity,
+            "temperature": config.temperature,
+            "max_tokens": config.max_tokens
         }
-        
+    
     except Exception as e:
         return {
             "gemini_api_configured": False,
@@ -95,11 +208,48 @@ def get_ai_config_status() -> Dict:
             "min_similarity": 0.3,
             "temperature": 0.7,
             "max_tokens": 1024,
-            "error": str(e)
+            "error": _error_message(e)
+        }
+
+
+async def _get_message_counts(db, today: str) -> Dict[str, int]:
+    """
+    Hitung pesan per role dan pesan hari ini.
+    
+    Membaca counter chat_message_totals / chat_message_daily yang diperbarui
+    trigger (scripts/migrations/004_chat_message_rollup.sql). Jika tabel rollup
+    belum ada, jatuh ke count per role di sisi server.
+    """
+    try:
+        totals, daily = await asyncio.gather(
+            _execute(db.table("chat_message_totals").select("role, message_count")),
+            _execute(db.table("chat_message_daily").select("role, message_count").eq("day", today))
+        )
+        
+        by_role = {row["role"]: int(row["message_count"]) for row in totals.data or []}
+        return {
+            "total": sum(by_role.values()),
+            "user": by_role.get("user", 0),
+            "assistant": by_role.get("assistant", 0),
+            "today": sum(int(row["message_count"]) for row in daily.data or [])
         }
+    except asyncio.TimeoutError:
+        raise
+    except Exception as e:
+        print(f"Chat message rollup unavailable, counting chat_history: {e}")
+    
+    messages = db.table("chat_history")
+    total, user, assistant, messages_today = await asyncio.gather(
+        _count(messages.select("id", count="exact", head=True)),
+        _count(messages.select("id", count="exact", head=True).eq("role", "user")),
+        _count(messages.select("id", count="exact", head=True).eq("role", "assistant")),
+        _count(messages.select("id", count="exact", head=True).gte("created_at", today))
+    )
+    return {"total": total, "user": user, "assistant": assistant, "today": messages_today}
 
 
-def get_chat_analytics() -> Dict:
+@_swr_cached("chat_analytics")
+async def get_chat_analytics() -> Dict:
     """
     Get analytics tentang chat sessions dan messages.
     
@@ -107,52 +257,37 @@ def get_chat_analytics() -> Dict:
         Dict dengan chat analytics metrics
     """
     try:
-        # Total sessions
-        sessions_response = supabase.table("chat_sessions").select("id", count="exact").execute()
-        total_sessions = sessions_response.count if sessions_response.count else 0
-        
-        # Active sessions (last 24 hours)
+        db = await get_async_supabase()
+        sessions = db.table("chat_sessions")
         yesterday = (datetime.now() - timedelta(hours=24)).isoformat()
-        active_sessions_response = supabase.table("chat_sessions").select(
-            "id", count="exact"
-        ).gte("last_activity", yesterday).eq("is_active", True).execute()
-        active_sessions = active_sessions_response.count if active_sessions_response.count else 0
-        
-        # Total messages
-        messages_response = supabase.table("chat_history").select("id, role", count="exact").execute()
-        total_messages = messages_response.count if messages_response.count else 0
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # User vs Assistant messages
-        user_messages = sum(1 for msg in messages_response.data if msg.get("role") == "user")
-        assistant_messages = sum(1 for msg in messages_response.data if msg.get("role") == "assistant")
+        total_sessions, active_sessions, sessions_today, message_counts = await asyncio.gather(
+            # Total sessions
+            _count(sessions.select("id", count="exact", head=True)),
+            # Active sessions (last 24 hours)
+            _count(sessions.select("id", count="exact", head=True).gte("last_activity", yesterday).eq("is_active", True)),
+            # Sessions created today
+            _count(sessions.select("id", count="exact", head=True).gte("created_at", today_start.isoformat())),
+            # Message counts dari rollup (O(1), tidak tergantung ukuran chat_history)
+            _get_message_counts(db, today_start.date().isoformat())
+        )
+        total_messages = message_counts["total"]
         
         # Average messages per session
         avg_messages = (total_messages / total_sessions) if total_sessions > 0 else 0
         
-        # Sessions created today
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-        sessions_today_response = supabase.table("chat_sessions").select(
-            "id", count="exact"
-        ).gte("created_at", today_start).execute()
-        sessions_today = sessions_today_response.count if sessions_today_response.count else 0
-        
-        # Messages sent today
-        messages_today_response = supabase.table("chat_history").select(
-            "id", count="exact"
-        ).gte("created_at", today_start).execute()
-        messages_today = messages_today_response.count if messages_today_response.count else 0
-        
         return {
             "total_sessions": total_sessions,
             "active_sessions": active_sessions,
             "total_messages": total_messages,
-            "user_messages": user_messages,
-            "assistant_messages": assistant_messages,
+            "user_messages": message_counts["user"],
+            "assistant_messages": message_counts["assistant"],
             "avg_messages_per_session": round(avg_messages, 2),
             "sessions_today": sessions_today,
-            "messages_today": messages_today
+            "messages_today": message_counts["today"]
         }
-        
+    
     except Exception as e:
         return {
             "total_sessions": 0,
@@ -163,11 +298,11 @@ def get_chat_analytics() -> Dict:
             "avg_messages_per_session": 0,
             "sessions_today": 0,
             "messages_today": 0,
-            "error": str(e)
+            "error": _error_message(e)
         }
 
 
-def check_database_health() -> Dict:
+async def check_database_health() -> Dict:
     """
     Check database connection health.
     
@@ -175,23 +310,22 @@ def check_database_health() -> Dict:
         Dict dengan database health status
     """
     try:
+        db = await get_async_supabase()
+        
         start_time = time.time()
         
         # Try to query a simple table
-        response = supabase.table("services").select("id").limit(1).execute()
+        await _execute(db.table("services").select("id").limit(1))
         
         response_time_ms = (time.time() - start_time) * 1000
         
         # Check if all tables are accessible
         tables = ["services", "service_embeddings", "ai_config", "chat_sessions", "chat_history", "admin_users"]
-        tables_accessible = True
-        
-        for table in tables:
-            try:
-                supabase.table(table).select("*").limit(1).execute()
-            except Exception:
-                tables_accessible = False
-                break
+        probes = await asyncio.gather(
+            *(_execute(db.table(table).select("*").limit(1)) for table in tables),
+            return_exceptions=True
+        )
+        tables_accessible = not any(isinstance(probe, Exception) for probe in probes)
         
         return {
             "status": "healthy",
@@ -199,17 +333,17 @@ def check_database_health() -> Dict:
             "tables_accessible": tables_accessible,
             "error": None
         }
-        
+    
     except Exception as e:
         return {
             "status": "unhealthy",
             "response_time_ms": None,
             "tables_accessible": False,
-            "error": str(e)
+            "error": _error_message(e)
         }
 
 
-def check_llm_health() -> Dict:
+async def check_llm_health() -> Dict:
     """
     Check LLM service health.
     
@@ -217,36 +351,32 @@ def check_llm_health() -> Dict:
         Dict dengan LLM health status
     """
     try:
-        from app.services.llm_service import get_configured_model
-
+        from app.services.llm_service import (GEMINI_MODEL_NAME,
+                                              get_configured_model)
+        
         # Try to get configured model
-        model = get_configured_model()
+        config = await asyncio.wait_for(get_config_snapshot_async(), DASHBOARD_QUERY_TIMEOUT)
+        model = get_configured_model(config)
         
         return {
             "status": "healthy",
             "api_key_configured": True,
-            "model_name": "gemini-2.0-flash-exp",
+            "model_name": GEMINI_MODEL_NAME,
             "error": None
         }
-        
+    
     except Exception as e:
         return {
             "status": "unhealthy",
             "api_key_configured": False,
             "model_name": "gemini-2.0-flash-exp",
-            "error": str(e)
+            "error": _error_message(e)
         }
 
 
-def get_system_health() -> Dict:
-    """
-    Get overall system health status.
-    
-    Returns:
-        Dict dengan complete system health check
-    """
-    database = check_database_health()
-    llm = check_llm_health()
+@_swr_cached("system_health")
+async def _get_health_checks() -> Dict:
+    database, llm = await asyncio.gather(check_database_health(), check_llm_health())
     
     # Determine overall status
     if database["status"] == "healthy" and llm["status"] == "healthy":
@@ -260,22 +390,63 @@ def get_system_health() -> Dict:
         "overall_status": overall_status,
         "database": database,
         "llm": llm,
-        "embedding_service": "healthy",  # Assuming embedding service is healthy if we can import it
-        "uptime": None  # Could add actual uptime tracking if needed
+        "embedding_service": "healthy"  # Assuming embedding service is healthy if we can import it
+    }
+
+
+async def get_system_health() -> Dict:
+    """
+    Get overall system health status.
+    Health check di-cache (stale-while-revalidate); uptime dan latency selalu terkini.
+    
+    Returns:
+        Dict dengan complete system health check
+    """
+    health = await _get_health_checks()
+    
+    return {
+        **health,
+        "uptime": metrics.format_uptime(),
+        "uptime_seconds": round(metrics.get_uptime_seconds(), 3),
+        "latency": metrics.get_latency_summary()
     }
 
 
-def get_complete_dashboard() -> Dict:
+async def get_complete_dashboard() -> Dict:
     """
     Generate complete admin dashboard dengan semua metrics.
+    Semua section diambil bersamaan; latency mendekati query paling lambat.
     
     Returns:
         Dict dengan complete dashboard data
     """
+    knowledge_base, ai_config, chat_analytics, system_health = await asyncio.gather(
+        get_knowledge_base_stats(),
+        get_ai_config_status(),
+        get_chat_analytics(),
+        get_system_health()
+    )
+    
+    errors = {
+        section: data["error"]
+        for section, data in (
+            ("knowledge_base", knowledge_base),
+            ("ai_config", ai_config),
+            ("chat_analytics", chat_analytics),
+            ("database", system_health["database"]),
+            ("llm", system_health["llm"])
+        )
+        if data.get("error")
+    }
+    
     return {
-        "knowledge_base": get_knowledge_base_stats(),
-        "ai_config": get_ai_config_status(),
-        "chat_analytics": get_chat_analytics(),
-        "system_health": get_system_health(),
+        "knowledge_base": knowledge_base,
+        "ai_config": ai_config,
+        "chat_analytics": chat_analytics,
+        "system_health": system_health,
+        "answer_cache": answer_cache.get_stats(),
+        "fast_path": fast_path.get_stats(),
+        "intent_router": intent_service.get_stats(),
+        "errors": errors,
         "generated_at": datetime.now().isoformat()
     }
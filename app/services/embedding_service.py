@@ -1,11 +1,88 @@
+import asyncio
+import hashlib
+import json
+import os
 import re
+import threading
 
 import numpy as np
-from chonkie import AutoEmbeddings
+
+from app.utils.cache import TTLCache
 
 # Pilih model
 # embeddings = AutoEmbeddings.get_embeddings("all-MiniLM-L6-v2")         # 384 dimensi
-embeddings = AutoEmbeddings.get_embeddings("minishlab/potion-base-32M")  # 512 dimensi
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "minishlab/potion-base-32M")  # 512 dimensi
+# Direktori artefak model lokal (hasil scripts/export_embedding_model.py). Jika di-set,
+# tabel embedding dimuat dari disk sebagai memory-mapped array: tanpa network, dan
+# halaman memorinya dipakai bersama oleh semua worker di mesin yang sama.
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH")
+
+def _load_npy(model_path: str, filename: str):
+    path = os.path.join(model_path, filename)
+    return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+def load_local_embeddings(model_path: str):
+    """
+    Muat model2vec StaticModel dari direktori artefak lokal.
+    
+    Args:
+        model_path: Direktori berisi embeddings.npy, tokenizer.json, config.json
+                    (opsional weights.npy dan token_mapping.npy)
+        
+    Returns:
+        Model2VecEmbeddings yang membungkus StaticModel (vectors read-only, mmap)
+    """
+    from chonkie.embeddings import Model2VecEmbeddings
+    from model2vec import StaticModel
+    from tokenizers import Tokenizer
+    
+    with open(os.path.join(model_path, "config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    
+    model = StaticModel(
+        vectors=_load_npy(model_path, "embeddings.npy"),
+        tokenizer=Tokenizer.from_file(os.path.join(model_path, "tokenizer.json")),
+        config=config,
+        normalize=config.get("normalize"),
+        base_model_name=config.get("base_model_name"),
+        language=config.get("language"),
+        weights=_load_npy(model_path, "weights.npy"),
+        token_mapping=_load_npy(model_path, "token_mapping.npy")
+    )
+    return Model2VecEmbeddings(model=model)
+
+def load_embedding_model(model_name: str = EMBEDDING_MODEL_NAME, model_path: str = EMBEDDING_MODEL_PATH):
+    """Model dari artefak lokal jika model_path di-set, selain itu dari Hugging Face."""
+    if model_path:
+        return load_local_embeddings(model_path)
+    # Import chonkie mahal (ratusan ms); tunda sampai model benar-benar dimuat
+    from chonkie import AutoEmbeddings
+    return AutoEmbeddings.get_embeddings(model_name)
+
+# Model dimuat saat pertama dipakai (atau saat warmup di lifespan), bukan saat import
+embeddings = None
+_embeddings_lock = threading.Lock()
+
+def get_embeddings_model():
+    """Model embedding aktif; dimuat sekali secara thread-safe saat pertama dipanggil."""
+    global embeddings
+    if embeddings is None:
+        with _embeddings_lock:
+            if embeddings is None:
+                embeddings = load_embedding_model()
+    return embeddings
+
+# Cache embedding query user (key: teks yang sudah di-preprocess)
+_query_cache = TTLCache(
+    maxsize=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+)
+
+# Micro-batching query embedding: cache miss yang datang bersamaan dikumpulkan paling lama
+# QUERY_BATCH_WAIT_MS (atau sampai QUERY_BATCH_MAX_SIZE query) lalu di-encode sebagai satu batch.
+# QUERY_BATCH_WAIT_MS=0 menonaktifkan batching (setiap query di-encode sendiri).
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+QUERY_BATCH_WAIT_MS = float(os.getenv("QUERY_BATCH_WAIT_MS", "2"))
 
 def join_service_content_with_labels(service) -> str:
     """
@@ -62,8 +139,16 @@ def preprocess_text(text: str) -> str:
     text = text.strip()
     return text
 
+def prepare_service_content(service) -> str:
+    """Teks persis yang di-embed untuk sebuah layanan (join + preprocess)."""
+    return preprocess_text(join_service_content_with_labels(service))
+
+def compute_content_hash(content: str) -> str:
+    """SHA-256 (hex) dari teks yang di-embed, disimpan di service_embeddings.content_hash."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
 def generate_embedding(content: str) -> list[float]:
-    return embeddings.embed(content).tolist()
+    return get_embeddings_model().embed(content).tolist()
 
 def normalize_vector(vec: list[float]) -> list[float]:
     arr = np.array(vec)
@@ -72,9 +157,205 @@ def normalize_vector(vec: list[float]) -> list[float]:
         return arr.tolist()
     return (arr / norm).tolist()
 
+def generate_embeddings_batch(contents: list[str]) -> np.ndarray:
+    """Embed banyak teks dalam satu panggilan model. Returns array (N, D) float32."""
+    if not contents:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.asarray(get_embeddings_model().embed_batch(contents), dtype=np.float32).reshape(len(contents), -1)
+
+def normalize_vectors(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize setiap baris; baris dengan norm 0 dibiarkan apa adanya."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def embed_batch(texts: list[str]) -> np.ndarray:
+    """Preprocess + embed + normalize banyak teks sekaligus. Returns array (N, D) float32."""
+    processed = [preprocess_text(text) for text in texts]
+    return normalize_vectors(generate_embeddings_batch(processed))
+
+def pipeline_embedding_batch(services: list) -> tuple[list[str], np.ndarray]:
+    """
+    Versi batch dari pipeline_embedding.
+    
+    Args:
+        services: List objek Service
+        
+    Returns:
+        tuple: (list konten yang sudah di-preprocess, array embedding (N, D) ter-normalisasi)
+    """
+    processed_contents = [prepare_service_content(service) for service in services]
+    return processed_contents, embed_contents_batch(processed_contents)
+
+def embed_contents_batch(processed_contents: list[str]) -> np.ndarray:
+    """Embed + normalize teks yang sudah di-preprocess (lihat prepare_service_content)."""
+    return normalize_vectors(generate_embeddings_batch(processed_contents))
+
 def pipeline_embedding(service) -> tuple[str, list[float]]:
-    raw_content = join_service_content_with_labels(service)
-    processed_content = preprocess_text(raw_content)
-    emb_vector = generate_embedding(processed_content)
-    emb_vector_norm = normalize_vector(emb_vector)
-    return processed_content, emb_vector_norm
\ No newline at end of file
+    contents, emb_matrix = pipeline_embedding_batch([service])
+    return contents[0], emb_matrix[0].tolist()
+
+def _compute_query_embedding(key: tuple) -> np.ndarray:
+    _, processed = key
+    vector = np.asarray(normalize_vector(generate_embedding(processed)), dtype=np.float32)
+    vector.setflags(write=False)
+    _query_cache.set(key, vector)
+    return vector
+
+def _compute_query_embeddings(keys: list[tuple]) -> list[np.ndarray]:
+    matrix = normalize_vectors(generate_embeddings_batch([processed for _, processed in keys]))
+    vectors = []
+    for key, row in zip(keys, matrix):
+        vector = np.array(row, dtype=np.float32)
+        vector.setflags(write=False)
+        _query_cache.set(key, vector)
+        vectors.append(vector)
+    return vectors
+
+class QueryEncoder:
+    """
+    Encoder query dengan micro-batching untuk satu event loop.
+    
+    Jika tidak ada batch yang sedang di-encode, query langsung dikirim pada
+    iterasi event loop berikutnya (tanpa tambahan latency saat sepi; query lain
+    di iterasi yang sama ikut masuk batch). Selama model sibuk, query baru
+    dikumpulkan sampai batch sebelumnya selesai, max_wait detik berlalu, atau
+    max_batch_size tercapai, lalu di-encode dalam satu panggilan model di
+    executor. Hasil dikirim lewat future masing-masing; query identik yang
+    sedang menunggu atau sedang di-encode memakai future yang sama.
+    """
+    
+    def __init__(self, max_batch_size: int = QUERY_BATCH_MAX_SIZE, max_wait: float = QUERY_BATCH_WAIT_MS / 1000):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.loop = asyncio.get_running_loop()
+        self._pending: dict[tuple, asyncio.Future] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._flush_handle = None
+        self._tasks = set()
+        self.batches = 0
+        self.queries = 0
+    
+    def submit(self, key: tuple) -> asyncio.Future:
+        future = self._pending.get(key) or self._inflight.get(key)
+        if future is not None:
+            return future
+        
+        future = self.loop.create_future()
+        self._pending[key] = future
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            delay = self.max_wait if self._tasks else 0
+            self._flush_handle = self.loop.call_later(delay, self._flush)
+        return future
+    
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self._inflight.update(batch)
+            task = self.loop.create_task(self._encode(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _encode(self, batch: dict) -> None:
+        keys = list(batch)
+        try:
+            vectors = await self.loop.run_in_executor(None, _compute_query_embeddings, keys)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, vector in zip(keys, vectors):
+                if not batch[key].done():
+                    batch[key].set_result(vector)
+        finally:
+            for key in keys:
+                self._inflight.pop(key, None)
+        self.batches += 1
+        self.queries += len(keys)
+        # Query yang terkumpul selama model sibuk tidak perlu menunggu max_wait lagi
+        if self._pending:
+            self._flush()
+    
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+_query_encoder = None
+
+def get_query_encoder() -> QueryEncoder:
+    """QueryEncoder untuk event loop yang sedang berjalan (dibuat ulang jika loop berganti)."""
+    global _query_encoder
+    loop = asyncio.get_running_loop()
+    if _query_encoder is None or _query_encoder.loop is not loop:
+        _query_encoder = QueryEncoder(QUERY_BATCH_MAX_SIZE, QUERY_BATCH_WAIT_MS / 1000)
+    return _query_encoder
+
+def embed_query(text: str) -> np.ndarray:
+    """
+    Preprocess + embed + normalize teks query, dengan cache.
+    
+    Args:
+        text: Teks mentah (pertanyaan user, jawaban, dsb)
+        
+    Returns:
+        np.ndarray: Vektor float32 ter-normalisasi (read-only, jangan diubah)
+    """
+    key = (EMBEDDING_MODEL_NAME, preprocess_text(text))
+    
+    vector = _query_cache.get(key)
+    if vector is None:
+        vector = _compute_query_embedding(key)
+    
+    return vector
+
+async def embed_query_async(text: str) -> np.ndarray:
+    """
+    Versi async dari embed_query. Cache hit dijawab langsung; cache miss
+    di-encode lewat QueryEncoder (micro-batching, di executor) agar event loop
+    tidak terblokir.
+    """
+    key = (EMBEDDING_MODEL_NAME, preprocess_text(text))
+    
+    vector = _query_cache.get(key)
+    if vector is None:
+        if QUERY_BATCH_WAIT_MS <= 0:
+            loop = asyncio.get_running_loop()
+            vector = await loop.run_in_executor(None, _compute_query_embedding, key)
+        else:
+            # shield: future bisa dipakai bersama beberapa request; pembatalan satu
+            # request tidak boleh membatalkan hasil untuk request lain
+            vector = await asyncio.shield(get_query_encoder().submit(key))
+    
+    return vector
+
+def get_query_cache_stats() -> dict:
+    return _query_cache.stats()
+
+def get_query_batch_stats() -> dict:
+    return _query_encoder.stats() if _query_encoder is not None else {}
+
+def clear_query_cache() -> None:
+    _query_cache.clear()
+
+def set_embedding_model(model_name: str) -> None:
+    """
+    Ganti model embedding yang aktif. Cache query dikosongkan karena vektor
+    dari model lama tidak bisa dibandingkan dengan model baru.
+    """
+    global embeddings, EMBEDDING_MODEL_NAME
+    
+    with _embeddings_lock:
+        embeddings = load_embedding_model(model_name, model_path=None)
+    EMBEDDING_MODEL_NAME = model_name
+    clear_query_cache()
@@ -0,0 +1,205 @@
+"""
+Fast path: jawab pertanyaan lookup sederhana langsung dari field layanan, tanpa LLM.
+
+Dipakai jika pertanyaan hanya menanyakan satu hal (persyaratan, biaya, waktu,
+atau prosedur), hasil RAG teratas sangat mirip (>= FAST_PATH_MIN_SIMILARITY),
+dan jaraknya ke layanan kedua cukup jauh (>= FAST_PATH_MIN_MARGIN) sehingga
+layanan yang dimaksud tidak ambigu. Jawaban disusun dari template per intent
+dengan field yang sama seperti join_service_content_with_labels. Pertanyaan
+lain (perbandingan, kondisi khusus, lebih dari satu hal) tetap ke LLM.
+"""
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.database.client import get_async_supabase
+from app.utils.cache import TTLCache
+from app.utils.metrics import observe
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+FAST_PATH_MIN_SIMILARITY = float(os.getenv("FAST_PATH_MIN_SIMILARITY", "0.8"))
+FAST_PATH_MIN_MARGIN = float(os.getenv("FAST_PATH_MIN_MARGIN", "0.1"))
+# Pertanyaan lebih panjang dari ini dianggap bukan lookup sederhana
+FAST_PATH_MAX_WORDS = int(os.getenv("FAST_PATH_MAX_WORDS", "15"))
+FAST_PATH_SERVICE_TTL = float(os.getenv("FAST_PATH_SERVICE_TTL", "600"))
+
+# intent -> (kata kunci, field layanan, template jawaban)
+FAST_PATH_INTENTS: Dict[str, Tuple[Tuple[str, ...], str, str]] = {
+    "persyaratan": (
+        ("syarat", "persyaratan", "dokumen", "berkas", "bawa", "dibawa", "lampiran"),
+        "persyaratan",
+        "Persyaratan layanan {nama_layanan}:\n{value}"
+    ),
+    "biaya": (
+        ("biaya", "tarif", "bayar", "membayar", "harga", "gratis", "retribusi"),
+        "tarif_pelayanan",
+        "Biaya layanan {nama_layanan}: {value}."
+    ),
+    "waktu": (
+        ("waktu", "lama", "durasi", "hari"),
+        "waktu_penyelesaian",
+        "Waktu penyelesaian layanan {nama_layanan}: {value}."
+    ),
+    "prosedur": (
+        ("prosedur", "cara", "langkah", "alur", "tahapan"),
+        "prosedur",
+        "Prosedur layanan {nama_layanan}:\n{value}"
+    ),
+}
+FAST_PATH_FOOTER = "\n\nLayanan ini diselenggarakan oleh {instansi_penyelenggara}."
+
+# Kata yang menandakan pertanyaan butuh penalaran (kondisi, perbandingan, masalah)
+_COMPLEX_WORDS = {
+    "jika", "apabila", "kenapa", "mengapa", "beda", "bedanya", "perbedaan", "dibanding",
+    "dibandingkan", "bandingkan", "hilang", "rusak", "ditolak", "terlambat", "bisakah",
+    "bolehkah", "boleh", "selain"
+}
+_WORD = re.compile(r"[a-z0-9]+")
+# Item daftar di data layanan dipisah " | " atau bernomor ("  4. Counter")
+_LIST_SPLIT = re.compile(r"\s*\|\s*|\s+\d+\.\s+")
+_SERVICE_FIELDS = "id, nama_layanan, instansi_penyelenggara, " + ", ".join(
+    sorted({field for _, field, _ in FAST_PATH_INTENTS.values()})
+)
+
+_service_rows = TTLCache(maxsize=1024, ttl=FAST_PATH_SERVICE_TTL)
+_attempts = 0
+_hits: Counter = Counter()
+_skipped: Counter = Counter()
+
+
+def _words(text: str) -> List[str]:
+    # "syaratnya", "biayanya" -> "syarat", "biaya"
+    return [word[:-3] if word.endswith("nya") and len(word) > 5 else word for word in _WORD.findall(text.lower())]
+
+
+def detect_intent(user_query: str) -> Optional[str]:
+    """
+    Intent lookup dari pertanyaan, atau None jika pertanyaan bukan lookup
+    sederhana (tidak ada atau lebih dari satu intent, terlalu panjang, atau
+    memuat kata kondisi/perbandingan).
+    """
+    words = _words(user_query)
+    if not words or len(words) > FAST_PATH_MAX_WORDS or _COMPLEX_WORDS.intersection(words):
+        return None
+    word_set = set(words)
+    matched = [
+        intent for intent, (keywords, _, _) in FAST_PATH_INTENTS.items()
+        if word_set.intersection(keywords)
+    ]
+    return matched[0] if len(matched) == 1 else None
+
+
+def _format_value(value: str) -> str:
+    items = [item.strip(" .") for item in _LIST_SPLIT.split(value.strip()) if item.strip(" .")]
+    if len(items) > 1:
+        return "\n".join(f"{idx}. {item}" for idx, item in enumerate(items, 1))
+    return items[0] if items else ""
+
+
+def format_answer(intent: str, service: Dict[str, Any]) -> Optional[str]:
+    """Jawaban dari template intent, atau None jika field layanan kosong."""
+    _, field, template = FAST_PATH_INTENTS[intent]
+    value = _format_value(service.get(field) or "")
+    name = (service.get("nama_layanan") or "").strip()
+    if not value or not name:
+        return None
+
+    answer = template.format(nama_layanan=name, value=value)
+    instansi = (service.get("instansi_penyelenggara") or "").strip()
+    if instansi:
+        answer += FAST_PATH_FOOTER.format(instansi_penyelenggara=instansi)
+    return answer
+
+
+def _confident_match(search_results: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(hasil teratas, None) jika cukup yakin, atau (None, alasan ditolak)."""
+    if not search_results:
+        return None, "no_results"
+    ranked = sorted(search_results, key=lambda result: result.get("similarity") or 0, reverse=True)
+    top = ranked[0].get("similarity") or 0
+    if top < FAST_PATH_MIN_SIMILARITY:
+        return None, "low_similarity"
+    if len(ranked) > 1 and top - (ranked[1].get("similarity") or 0) < FAST_PATH_MIN_MARGIN:
+        return None, "small_margin"
+    return ranked[0], None
+
+
+async def _get_service_row(service_id: str) -> Optional[Dict[str, Any]]:
+    row = _service_rows.get(service_id)
+    if row is None:
+        db = await get_async_supabase()
+        result = await db.table("services").select(_SERVICE_FIELDS).eq("id", service_id).execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        _service_rows.set(service_id, row)
+    return row
+
+
+async def _answer(user_query: str, search_results: List[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+    """(jawaban, None) atau (None, alasan ditolak)."""
+    intent = detect_intent(user_query)
+    if intent is None:
+        return None, "no_intent"
+    match, reason = _confident_match(search_results)
+    if match is None:
+        return None, reason
+
+    try:
+        service = await _get_service_row(str(match.get("service_id")))
+    except Exception as e:
+        print(f"Fast path service fetch failed: {e}")
+        return None, "error"
+    answer = format_answer(intent, service) if service else None
+    if answer is None:
+        return None, "missing_field"
+
+    _hits[intent] += 1
+    return answer, None
+
+
+async def try_answer(user_query: str, search_results: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Jawab pertanyaan tanpa LLM jika memenuhi syarat fast path.
+
+    Latency dicatat terpisah: stage `fast_path_answer` untuk pertanyaan yang
+    dijawab fast path, `fast_path_check` untuk overhead pada pertanyaan yang
+    diteruskan ke LLM.
+
+    Returns:
+        str jawaban, atau None jika pertanyaan harus dijawab LLM
+    """
+    global _attempts
+
+    if not FAST_PATH_ENABLED:
+        return None
+    _attempts += 1
+    start = time.perf_counter()
+
+    answer, reason = await _answer(user_query, search_results)
+    if answer is None:
+        _skipped[reason] += 1
+        observe("fast_path_check", time.perf_counter() - start)
+    else:
+        observe("fast_path_answer", time.perf_counter() - start)
+    return answer
+
+
+def invalidate_services(service_ids) -> None:
+    """Buang data layanan tersimpan untuk layanan yang berubah atau dihapus."""
+    for service_id in service_ids:
+        _service_rows.pop(str(service_id))
+
+
+def get_stats() -> Dict[str, Any]:
+    hits = sum(_hits.values())
+    return {
+        "enabled": FAST_PATH_ENABLED,
+        "attempts": _attempts,
+        "hits": hits,
+        "hit_rate": round(hits / _attempts, 4) if _attempts else None,
+        "hits_by_intent": dict(_hits),
+        "skipped": dict(_skipped)
+    }
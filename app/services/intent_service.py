@@ -0,0 +1,193 @@
+"""
+Intent router ringan di depan rag_pipeline.
+
+Sapaan, ucapan terima kasih, salam penutup, dan pertanyaan tentang chatbot
+sendiri dikenali dengan aturan kata kunci (beberapa mikrodetik per pesan) dan
+dijawab dengan balasan template, tanpa ambil riwayat, embedding, retrieval,
+atau panggilan Gemini. Pesan hanya dianggap basa-basi jika seluruh isinya
+berupa frasa basa-basi (plus sapaan seperti "kak", "min"); "halo, apa syarat
+KTP?" tetap diproses RAG.
+
+Pertanyaan di luar domain (tidak ada layanan yang cocok dan tidak ada riwayat
+percakapan) juga dijawab dengan balasan template tanpa LLM.
+"""
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.metrics import observe
+
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+
+# intent -> frasa (sudah dinormalisasi: huruf kecil, tanpa tanda baca, huruf berulang dipadatkan)
+SMALL_TALK_PHRASES: Dict[str, tuple] = {
+    "thanks": (
+        "terima kasih", "terimakasih", "makasih", "makasi", "trima kasih", "thanks", "thank you",
+        "thx", "suksma", "matur suksma", "tengkyu"
+    ),
+    "farewell": (
+        "sampai jumpa", "sampai ketemu", "dadah", "dah", "bye", "selamat tinggal"
+    ),
+    "greeting": (
+        "halo", "hallo", "helo", "hello", "hai", "hi", "hey", "pagi", "siang", "sore", "malam",
+        "selamat pagi", "selamat siang", "selamat sore", "selamat malam", "assalamualaikum",
+        "om swastiastu", "salam", "permisi", "tes", "test"
+    ),
+    "identity": (
+        "siapa kamu", "kamu siapa", "kamu itu siapa", "siapa namamu", "nama kamu siapa",
+        "kamu bisa apa", "bisa bantu apa", "apa yang bisa kamu bantu", "kamu bot"
+    ),
+    "acknowledgement": (
+        "ok", "oke", "okay", "baik", "baiklah", "siap", "sip", "mantap", "paham", "mengerti",
+        "oh begitu", "begitu", "noted"
+    ),
+}
+# Kata pelengkap yang boleh menyertai frasa basa-basi ("terima kasih banyak ya kak")
+_FILLER_WORDS = {
+    "kak", "kakak", "min", "admin", "mimin", "bot", "pak", "bu", "bapak", "ibu", "ya", "yah",
+    "yaa", "juga", "banyak", "sekali", "semua", "sobat", "sewakadharma", "nya", "deh", "dong",
+    "kok", "sih", "atas", "infonya", "informasinya", "bantuannya", "jawabannya", "nih"
+}
+
+SMALL_TALK_REPLIES = {
+    "greeting": (
+        "{salutation} Saya asisten virtual layanan publik Kota Denpasar. "
+        "Silakan tanyakan informasi layanan publik, misalnya persyaratan, biaya, waktu "
+        "penyelesaian, atau prosedur suatu layanan."
+    ),
+    "thanks": "Sama-sama! Jika ada informasi layanan lain yang ingin ditanyakan, silakan sampaikan.",
+    "farewell": "Terima kasih telah menggunakan layanan kami. Sampai jumpa!",
+    "identity": (
+        "Saya asisten virtual layanan publik Kota Denpasar. Saya dapat membantu menjelaskan "
+        "persyaratan, biaya, waktu penyelesaian, dan prosedur layanan publik."
+    ),
+    "acknowledgement": "Baik. Jika ada informasi layanan lain yang ingin ditanyakan, silakan sampaikan.",
+}
+NO_MATCH_REPLY = (
+    "Maaf, saya tidak menemukan informasi layanan yang sesuai dengan pertanyaan Anda. "
+    "Saya hanya dapat membantu informasi layanan publik Kota Denpasar. Silakan sebutkan "
+    "nama layanan yang dimaksud, misalnya \"persyaratan pembuatan KTP\"."
+)
+
+# Balasan greeting mengikuti salam pengguna
+_SALUTATIONS = (
+    ("assalamualaikum", "Waalaikumsalam!"),
+    ("om swastiastu", "Om Swastiastu!"),
+    ("pagi", "Selamat pagi!"),
+    ("siang", "Selamat siang!"),
+    ("sore", "Selamat sore!"),
+    ("malam", "Selamat malam!"),
+)
+_DEFAULT_SALUTATION = "Halo!"
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_REPEATED = re.compile(r"([a-z])\1{2,}")
+
+
+def _index_phrases() -> Dict[str, List[Tuple[List[str], str]]]:
+    """Frasa per kata pertama; frasa terpanjang dicocokkan lebih dulu ("selamat pagi" sebelum "selamat")."""
+    index: Dict[str, List[Tuple[List[str], str]]] = {}
+    for intent, phrases in SMALL_TALK_PHRASES.items():
+        for phrase in phrases:
+            words = phrase.split()
+            index.setdefault(words[0], []).append((words, intent))
+    for candidates in index.values():
+        candidates.sort(key=lambda item: -len(item[0]))
+    return index
+
+
+_PHRASES = _index_phrases()
+_INTENT_PRIORITY = ("thanks", "farewell", "identity", "greeting", "acknowledgement")
+# Pesan basa-basi selalu pendek; pesan yang lebih panjang langsung diteruskan
+_MAX_WORDS = 12
+
+_routed: Counter = Counter()
+_passed = 0
+_no_match = 0
+
+
+def _normalize(message: str) -> List[str]:
+    # "Haloooo!!" -> ["halo"]
+    return _REPEATED.sub(r"\1", _NON_WORD.sub(" ", message.lower())).split()
+
+
+def classify_intent(message: str) -> Optional[str]:
+    """
+    Intent basa-basi dari pesan, atau None jika pesan harus diproses RAG.
+    """
+    words = _normalize(message)
+    if not words or len(words) > _MAX_WORDS:
+        return None
+
+    matched = set()
+    idx = 0
+    while idx < len(words):
+        for phrase, intent in _PHRASES.get(words[idx], ()):
+            if words[idx:idx + len(phrase)] == phrase:
+                matched.add(intent)
+                idx += len(phrase)
+                break
+        else:
+            if words[idx] not in _FILLER_WORDS:
+                return None
+            idx += 1
+
+    return next((intent for intent in _INTENT_PRIORITY if intent in matched), None)
+
+
+def _reply(intent: str, message: str) -> str:
+    if intent != "greeting":
+        return SMALL_TALK_REPLIES[intent]
+    text = " ".join(_normalize(message))
+    salutation = next((reply for key, reply in _SALUTATIONS if key in text), _DEFAULT_SALUTATION)
+    return SMALL_TALK_REPLIES["greeting"].format(salutation=salutation)
+
+
+def get_small_talk_reply(message: str) -> Optional[str]:
+    """
+    Balasan template untuk pesan basa-basi.
+
+    Returns:
+        str balasan, atau None jika pesan harus diproses pipeline RAG + LLM
+    """
+    global _passed
+
+    if not INTENT_ROUTER_ENABLED:
+        return None
+
+    start = time.perf_counter()
+    intent = classify_intent(message)
+    observe("intent_classify", time.perf_counter() - start)
+
+    if intent is None:
+        _passed += 1
+        return None
+    _routed[intent] += 1
+    return _reply(intent, message)
+
+
+def get_no_match_reply(search_results: List[Dict[str, Any]], conversation_context: str) -> Optional[str]:
+    """
+    Balasan template jika tidak ada layanan yang cocok (di luar domain). Turn
+    dengan riwayat percakapan tetap ke LLM karena bisa berupa pertanyaan lanjutan.
+    """
+    global _no_match
+
+    if not INTENT_ROUTER_ENABLED or search_results or conversation_context:
+        return None
+    _no_match += 1
+    return NO_MATCH_REPLY
+
+
+def get_stats() -> Dict[str, Any]:
+    routed = sum(_routed.values())
+    total = routed + _passed
+    return {
+        "enabled": INTENT_ROUTER_ENABLED,
+        "small_talk": routed,
+        "small_talk_rate": round(routed / total, 4) if total else None,
+        "small_talk_by_intent": dict(_routed),
+        "out_of_domain": _no_match
+    }
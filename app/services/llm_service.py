@@ -1,48 +1,131 @@
+import asyncio
 import os
-from typing import Any, Dict, List
+import threading
+import time
+from collections import OrderedDict
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional,
+                    Tuple)
 
-import google.generativeai as genai
 from dotenv import load_dotenv
 
-from app.services.ai_config_service import (get_active_gemini_key,
-                                            get_all_configs)
+from app.services.ai_config_service import (AIConfigSnapshot,
+                                            get_config_snapshot,
+                                            get_config_snapshot_async)
+from app.services.context_assembler import (assemble_service_context,
+                                            estimate_tokens,
+                                            trim_conversation_context)
+from app.services.conversation_summary import (CONVERSATION_SUMMARY_TOKENS,
+                                               bound_summary)
+from app.utils.metrics import observe, observe_tokens, timed
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 # Load environment variables
 load_dotenv()
 
 
-def get_configured_model():
+GEMINI_MODEL_NAME = "gemini-2.0-flash-exp"
+
+# Awalan jawaban ketika pemanggilan Gemini gagal (jawaban seperti ini tidak di-cache)
+ERROR_RESPONSE_PREFIX = "Maaf, terjadi kesalahan dalam memproses pertanyaan Anda"
+
+# Registry model Gemini: satu instance per (api_key, model_name, generation_config)
+_MAX_CACHED_MODELS = 4
+_model_lock = threading.Lock()
+_models: "OrderedDict[Tuple, genai.GenerativeModel]" = OrderedDict()
+_configured_api_key: Optional[str] = None
+
+
+def _build_model(api_key: str, model_name: str, gen_config: Dict[str, Any]) -> "genai.GenerativeModel":
+    """
+    Buat GenerativeModel baru. Harus dipanggil sambil memegang _model_lock karena
+    genai.configure mengubah state global SDK.
+    """
+    global _configured_api_key
+    
+    # SDK Gemini (grpc + protobuf) butuh ~0.4 detik untuk di-import; tunda sampai model pertama dibuat
+    import google.generativeai as genai
+    from google.generativeai import client as genai_client
+    
+    if api_key != _configured_api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+    
+    model = genai.GenerativeModel(
+        model_name,
+        generation_config=genai.GenerationConfig(**gen_config)
+    )
+    # SDK membuat client secara lazy dari config global saat request pertama;
+    # ikat sekarang supaya model tetap memakai API key ini walau config global berganti.
+    model._client = genai_client.get_default_generative_client()
+    try:
+        # Client async (grpc aio) hanya bisa dibuat di dalam event loop
+        asyncio.get_running_loop()
+        model._async_client = genai_client.get_default_generative_async_client()
+    except RuntimeError:
+        pass
+    return model
+
+
+def get_configured_model(config: Optional[AIConfigSnapshot] = None) -> "genai.GenerativeModel":
     """
     Get Gemini model dengan API key dari database (prioritas) atau env fallback.
-    Returns model yang sudah dikonfigurasi dengan API key.
+    Model di-cache per (api_key, model_name, generation_config) dan hanya dibangun
+    ulang ketika AI config berubah. Aman dipakai bersamaan dari banyak thread.
     """
+    config = config or get_config_snapshot()
+    
     # Try to get API key from database config first
-    api_key = get_active_gemini_key()
+    api_key = config.gemini_api_key
     
     # Fallback to environment variable if not set in database
     if not api_key:
         api_key = os.getenv("GEMINI_API_KEY")
     
-    # Configure Gemini API
-    genai.configure(api_key=api_key)
+    gen_config = get_generation_config(config)
+    key = (api_key, GEMINI_MODEL_NAME, tuple(sorted(gen_config.items())))
+    
+    model = _models.get(key)
+    if model is not None:
+        return model
     
-    # Initialize and return Gemini model
-    return genai.GenerativeModel('gemini-2.0-flash-exp')
+    with _model_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _build_model(api_key, GEMINI_MODEL_NAME, gen_config)
+            _models[key] = model
+            while len(_models) > _MAX_CACHED_MODELS:
+                _models.popitem(last=False)
+    
+    return model
 
 
-def get_generation_config() -> Dict[str, Any]:
+def get_generation_config(config: Optional[AIConfigSnapshot] = None) -> Dict[str, Any]:
     """
     Get generation config (temperature, max_tokens) dari database.
     Returns dict dengan parameter generation.
     """
-    configs = get_all_configs()
+    config = config or get_config_snapshot()
     
     return {
-        "temperature": float(configs.get("temperature", 0.7)),
-        "max_output_tokens": int(configs.get("max_tokens", 1024))
+        "temperature": config.temperature,
+        "max_output_tokens": config.max_tokens
     }
 
 
+def _record_prompt_stats(prompt: str, stats: Dict[str, int]) -> Dict[str, int]:
+    """Catat ukuran prompt dan jumlah token yang dipotong ke metrics."""
+    stats["prompt_tokens"] = estimate_tokens(prompt)
+    observe_tokens("prompt", stats["prompt_tokens"])
+    observe_tokens("context", stats.get("context_tokens", 0))
+    observe_tokens("context_cut", stats.get("context_tokens_original", 0) - stats.get("context_tokens", 0))
+    observe_tokens("context_duplicates", stats.get("duplicate_tokens_dropped", 0))
+    if "history_tokens_original" in stats:
+        observe_tokens("history_cut", stats["history_tokens_original"] - stats["history_tokens"])
+    return stats
+
+
 def build_prompt(user_query: str, search_results: List[Dict[str, Any]]) -> str:
     # Jika tidak ada hasil search
     if not search_results:
@@ -53,7 +136,8 @@ Namun tidak ada informasi layanan yang relevan ditemukan di database.
 Tolong beri tahu pengguna dengan sopan bahwa informasi yang mereka cari tidak tersedia.
 """
     
-    # Build context dari search results
+    # Build context dari search results (dalam batas token, lihat context_assembler)
+    search_results, stats = assemble_service_context(user_query, search_results)
     context_parts = []
     for idx, result in enumerate(search_results, 1):
         content = result.get('content', '')
@@ -88,40 +172,44 @@ INSTRUKSI:
 JAWABAN:
 """
     
+    _record_prompt_stats(prompt, stats)
     return prompt
 
 
-def generate_response(user_query: str, search_results: List[Dict[str, Any]]) -> str:
+async def generate_response(
+    user_query: str,
+    search_results: List[Dict[str, Any]],
+    config: Optional[AIConfigSnapshot] = None
+) -> str:
     """
     Generate response menggunakan Gemini dengan config dari database.
     
     Args:
         user_query: Pertanyaan user
         search_results: Hasil search dari RAG
+        config: Snapshot AI config (opsional, diambil dari cache jika kosong)
         
     Returns:
         Response string dari Gemini
     """
     try:
-        # Get configured model with API key from database
-        model = get_configured_model()
+        config = config or await get_config_snapshot_async()
         
-        # Get generation config from database
-        gen_config = get_generation_config()
+        # Get configured model with API key from database
+        model = get_configured_model(config)
         
         # Build prompt
-        prompt = build_prompt(user_query, search_results)
+        with timed("prompt_build"):
+            prompt = build_prompt(user_query, search_results)
         
         # Generate response dengan Gemini menggunakan config dari database
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(**gen_config)
-        )
+        with timed("llm_generate"):
+            response = await model.generate_content_async(prompt)
         
         return response.text
         
     except Exception as e:
-        return f"Maaf, terjadi kesalahan dalam memproses pertanyaan Anda: {str(e)}"
+        return f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
 
 
 def build_prompt_with_history(
@@ -129,6 +217,10 @@ def build_prompt_with_history(
     search_results: List[Dict[str, Any]],
     conversation_context: str = ""
 ) -> str:
+    stats: Dict[str, int] = {}
+    conversation_context, history_stats = trim_conversation_context(conversation_context)
+    stats.update(history_stats)
+    
     # Jika tidak ada hasil search
     if not search_results:
         base_prompt = f"""
@@ -138,7 +230,9 @@ Namun tidak ada informasi layanan yang relevan ditemukan di database.
 Tolong beri tahu pengguna dengan sopan bahwa informasi yang mereka cari tidak tersedia.
 """
     else:
-        # Build context dari search results
+        # Build context dari search results (dalam batas token, lihat context_assembler)
+        search_results, context_stats = assemble_service_context(user_query, search_results)
+        stats.update(context_stats)
         context_parts = []
         for idx, result in enumerate(search_results, 1):
             content = result.get('content', '')
@@ -188,13 +282,15 @@ INSTRUKSI:
 JAWABAN:
 """
     
+    _record_prompt_stats(prompt, stats)
     return prompt
 
 
-def generate_response_with_history(
+async def generate_response_with_history(
     user_query: str,
     search_results: List[Dict[str, Any]],
-    conversation_context: str = ""
+    conversation_context: str = "",
+    config: Optional[AIConfigSnapshot] = None
 ) -> str:
     """
     Generate response dengan conversation history menggunakan config dari database.
@@ -203,40 +299,83 @@ def generate_response_with_history(
         user_query: Pertanyaan user
         search_results: Hasil search dari RAG
         conversation_context: Previous conversation formatted string
+        config: Snapshot AI config (opsional, diambil dari cache jika kosong)
         
     Returns:
         Response string dari Gemini
     """
     try:
-        # Get configured model
-        model = get_configured_model()
+        config = config or await get_config_snapshot_async()
         
-        # Get generation config from database
-        gen_config = get_generation_config()
+        # Get configured model
+        model = get_configured_model(config)
         
         # Build prompt dengan history
-        prompt = build_prompt_with_history(user_query, search_results, conversation_context)
+        with timed("prompt_build"):
+            prompt = build_prompt_with_history(user_query, search_results, conversation_context)
         
         # Generate response dengan config dari database
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(**gen_config)
-        )
+        with timed("llm_generate"):
+            response = await model.generate_content_async(prompt)
         
         return response.text
         
     except Exception as e:
-        return f"Maaf, terjadi kesalahan dalam memproses pertanyaan Anda: {str(e)}"
+        return f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
+
+
+async def generate_response_with_history_stream(
+    user_query: str,
+    search_results: List[Dict[str, Any]],
+    conversation_context: str = "",
+    config: Optional[AIConfigSnapshot] = None
+) -> AsyncIterator[str]:
+    """
+    Versi streaming dari generate_response_with_history.
+    Yield potongan teks segera setelah Gemini menghasilkannya.
+    
+    Args:
+        user_query: Pertanyaan user
+        search_results: Hasil search dari RAG
+        conversation_context: Previous conversation formatted string
+        config: Snapshot AI config (opsional, diambil dari cache jika kosong)
+        
+    Yields:
+        Potongan teks jawaban
+    """
+    try:
+        config = config or await get_config_snapshot_async()
+        model = get_configured_model(config)
+        with timed("prompt_build"):
+            prompt = build_prompt_with_history(user_query, search_results, conversation_context)
+        
+        start = time.perf_counter()
+        first_token = True
+        response = await model.generate_content_async(prompt, stream=True)
+        
+        async for chunk in response:
+            # Chunk tanpa parts (mis. hanya finish_reason) tidak punya text
+            if chunk.parts:
+                if first_token:
+                    observe("llm_first_token", time.perf_counter() - start)
+                    first_token = False
+                yield chunk.text
+        
+        observe("llm_generate_stream", time.perf_counter() - start)
+        
+    except Exception as e:
+        yield f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
 
 
-def chat_with_rag(
+async def chat_with_rag(
     user_query: str,
     search_results: List[Dict[str, Any]],
     temperature: float = 0.7,
-    max_tokens: int = 1024
+    max_tokens: int = 1024,
+    config: Optional[AIConfigSnapshot] = None
 ) -> Dict[str, Any]:
     # Generate response
-    response = generate_response(user_query, search_results)
+    response = await generate_response(user_query, search_results, config)
     
     return {
         "query": user_query,
@@ -253,16 +392,62 @@ def chat_with_rag(
     }
 
 
-def chat_with_rag_and_history(
+async def chat_with_rag_and_history(
     user_query: str,
     search_results: List[Dict[str, Any]],
-    conversation_context: str = ""
+    conversation_context: str = "",
+    config: Optional[AIConfigSnapshot] = None
 ) -> Dict[str, Any]:
 
     # Generate response dengan history
-    response = generate_response_with_history(user_query, search_results, conversation_context)
+    response = await generate_response_with_history(user_query, search_results, conversation_context, config)
     
     return {
         "query": user_query,
         "response": response
     }
+
+
+async def generate_conversation_summary(
+    previous_summary: str,
+    user_message: str,
+    assistant_message: str,
+    config: Optional[AIConfigSnapshot] = None
+) -> str:
+    """
+    Perbarui ringkasan percakapan dengan satu pertukaran baru memakai Gemini
+    (output pendek, temperature rendah). Dipakai jika CONVERSATION_SUMMARY_MODE=llm.
+    
+    Args:
+        previous_summary: Ringkasan sebelumnya (boleh kosong)
+        user_message: Pertanyaan pengguna pada pertukaran yang dilipat
+        assistant_message: Jawaban asisten pada pertukaran tersebut
+        config: Snapshot AI config (opsional, diambil dari cache jika kosong)
+        
+    Returns:
+        Ringkasan baru, dibatasi CONVERSATION_SUMMARY_TOKENS
+    """
+    config = config or await get_config_snapshot_async()
+    model = get_configured_model(config)
+    
+    prompt = f"""
+Perbarui ringkasan percakapan antara pengguna dan asisten layanan publik Kota Denpasar.
+Tulis maksimal {CONVERSATION_SUMMARY_TOKENS * 3 // 4} kata dalam poin singkat berawalan "- ".
+Simpan layanan yang dibahas, kebutuhan pengguna, dan fakta penting dari jawaban (persyaratan, biaya, waktu).
+
+RINGKASAN SEBELUMNYA:
+{previous_summary or "(belum ada)"}
+
+PERTUKARAN BARU:
+Pengguna: {user_message}
+Asisten: {assistant_message}
+
+RINGKASAN BARU:
+"""
+    
+    with timed("summary_generate"):
+        response = await model.generate_content_async(
+            prompt,
+            generation_config={"temperature": 0.2, "max_output_tokens": CONVERSATION_SUMMARY_TOKENS}
+        )
+    return bound_summary(response.text.strip())
@@ -1,9 +1,17 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from app.database.client import supabase
 from app.schemas.mpp_service_schemas import (Service, ServiceCreate,
                                              ServiceUpdate)
-from app.services.embedding_service import pipeline_embedding
+from app.services import answer_cache, fast_path, vector_index
+from app.services.dashboard_service import invalidate_dashboard_cache
+from app.services.embedding_service import (compute_content_hash,
+                                            embed_contents_batch,
+                                            pipeline_embedding,
+                                            pipeline_embedding_batch,
+                                            prepare_service_content)
+
+_PAGE_SIZE = 1000
 
 
 def create_service(service: ServiceCreate) -> Service:
@@ -18,9 +26,12 @@ def create_service(service: ServiceCreate) -> Service:
     embedding_data = {
         "service_id": data["id"],
         "content": content,
+        "content_hash": compute_content_hash(content),
         "embedding": embedding
     }
     supabase.table("service_embeddings").insert(embedding_data).execute()
+    vector_index.upsert(data["id"], content, embedding)
+    invalidate_dashboard_cache("knowledge_base")
 
     return Service(**data)
 
@@ -32,26 +43,30 @@ def create_services(services: List[ServiceCreate]) -> List[Service]:
     services_data = [service.dict() for service in services]
     result = supabase.table("services").insert(services_data).execute()
     
-    # Generate embeddings untuk semua services
-    embedding_data_list = []
-    created_services = []
+    created_services = [Service(**data) for data in result.data]
     
-    for data in result.data:
-        service_obj = Service(**data)
-        created_services.append(service_obj)
-        
-        # Jalankan pipeline embedding
-        content, embedding = pipeline_embedding(service_obj)
-        
-        embedding_data_list.append({
-            "service_id": data["id"],
+    # Generate embeddings untuk semua services dalam satu batch
+    contents, emb_matrix = pipeline_embedding_batch(created_services)
+    
+    embedding_data_list = [
+        {
+            "service_id": service_obj.id,
             "content": content,
+            "content_hash": compute_content_hash(content),
             "embedding": embedding
-        })
+        }
+        for service_obj, content, embedding in zip(created_services, contents, emb_matrix.tolist())
+    ]
     
     # Bulk insert ke tabel service_embeddings
     if embedding_data_list:
         supabase.table("service_embeddings").insert(embedding_data_list).execute()
+        vector_index.upsert_many(
+            [item["service_id"] for item in embedding_data_list],
+            contents,
+            emb_matrix
+        )
+    invalidate_dashboard_cache("knowledge_base")
     
     return created_services
 
@@ -71,16 +86,27 @@ def update_service(service_id: str, service: ServiceUpdate) -> Optional[Service]
     
     if result.data:
         updated_service = Service(**result.data[0])
+        invalidate_dashboard_cache("knowledge_base")
         
-        # Re-generate embedding untuk data yang diupdate
-        content, embedding = pipeline_embedding(updated_service)
+        # Re-generate embedding kecuali baris embedding dengan hash yang sama sudah ada
+        # (layanan lama bisa belum punya baris embedding sama sekali)
+        content = prepare_service_content(updated_service)
+        content_hash = compute_content_hash(content)
         
-        # Update embedding di tabel service_embeddings
-        embedding_data = {
-            "content": content,
-            "embedding": embedding
-        }
-        supabase.table("service_embeddings").update(embedding_data).eq("service_id", service_id).execute()
+        if content_hash != get_embedding_hashes([service_id]).get(service_id):
+            embedding = embed_contents_batch([content])[0].tolist()
+            
+            # Upsert embedding di tabel service_embeddings (butuh migration 001)
+            embedding_data = {
+                "service_id": service_id,
+                "content": content,
+                "content_hash": content_hash,
+                "embedding": embedding
+            }
+            supabase.table("service_embeddings").upsert(embedding_data, on_conflict="service_id").execute()
+            vector_index.upsert(service_id, content, embedding)
+            answer_cache.invalidate_services([service_id])
+            fast_path.invalidate_services([service_id])
         
         return updated_service
     
@@ -88,4 +114,83 @@ def update_service(service_id: str, service: ServiceUpdate) -> Optional[Service]
 
 def delete_service(service_id: str) -> bool:
     result = supabase.table("services").delete().eq("id", service_id).execute()
-    return bool(result.data)
\ No newline at end of file
+    if result.data:
+        vector_index.remove(service_id)
+        answer_cache.invalidate_services([service_id])
+        fast_path.invalidate_services([service_id])
+        invalidate_dashboard_cache("knowledge_base")
+    return bool(result.data)
+
+def get_embedding_hashes(service_ids: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+    """
+    Ambil content_hash embedding per service_id.
+    
+    Args:
+        service_ids: Filter service_id (None = semua)
+        
+    Returns:
+        Dict service_id -> content_hash (None jika baris lama belum punya hash)
+    """
+    # Paginated seperti vector_index: PostgREST membatasi jumlah baris per request
+    hashes: Dict[str, Optional[str]] = {}
+    start = 0
+    while True:
+        query = supabase.table("service_embeddings").select("service_id, content_hash")
+        if service_ids is not None:
+            query = query.in_("service_id", service_ids)
+        result = query.range(start, start + _PAGE_SIZE - 1).execute()
+        batch = result.data or []
+        for item in batch:
+            hashes[str(item["service_id"])] = item.get("content_hash")
+        if len(batch) < _PAGE_SIZE:
+            return hashes
+        start += _PAGE_SIZE
+
+def reindex_services(force: bool = False) -> int:
+    """
+    Generate ulang embedding (batch) untuk services yang teksnya berubah dan simpan
+    ke service_embeddings. Butuh unique constraint pada service_embeddings.service_id
+    (lihat scripts/migrations/001_service_embeddings_unique_service_id.sql).
+    
+    Args:
+        force: Embed ulang semua services walaupun content_hash sama (mis. setelah ganti model)
+    
+    Returns:
+        int: Jumlah services yang di-embed ulang
+    """
+    services = get_services()
+    existing_hashes = {} if force else get_embedding_hashes()
+    
+    # Hanya services yang teks embedding-nya berubah atau belum punya embedding
+    changed = []
+    for service_obj in services:
+        content = prepare_service_content(service_obj)
+        content_hash = compute_content_hash(content)
+        if force or existing_hashes.get(service_obj.id) != content_hash:
+            changed.append((service_obj.id, content, content_hash))
+    
+    if not changed:
+        return 0
+    
+    emb_matrix = embed_contents_batch([content for _, content, _ in changed])
+    
+    embedding_data_list = [
+        {
+            "service_id": service_id,
+            "content": content,
+            "content_hash": content_hash,
+            "embedding": embedding
+        }
+        for (service_id, content, content_hash), embedding in zip(changed, emb_matrix.tolist())
+    ]
+    supabase.table("service_embeddings").upsert(embedding_data_list, on_conflict="service_id").execute()
+    vector_index.upsert_many(
+        [service_id for service_id, _, _ in changed],
+        [content for _, content, _ in changed],
+        emb_matrix
+    )
+    answer_cache.invalidate_services([service_id for service_id, _, _ in changed])
+    fast_path.invalidate_services([service_id for service_id, _, _ in changed])
+    invalidate_dashboard_cache("knowledge_base")
+    
+    return len(changed)
@@ -1,24 +1,40 @@
 from typing import Any, Dict, List
 
-from app.database.client import supabase
-from app.services.embedding_service import (generate_embedding,
-                                            normalize_vector, preprocess_text)
+from app.database.client import get_async_supabase
+from app.services import vector_index
+from app.services.embedding_service import embed_query_async
+from app.utils.metrics import timed
 
 
-def search_similar_services(
+async def search_similar_services(
     query: str,
     top_k: int = 5,
     similarity_threshold: float = 0.5
 ) -> List[Dict[str, Any]]:
-    # 1. Preprocess dan generate embedding untuk query user
-    processed_query = preprocess_text(query)
-    query_embedding = generate_embedding(processed_query)
-    query_embedding_norm = normalize_vector(query_embedding)
+    # 1. Preprocess dan generate embedding untuk query user (cached)
+    with timed("embed_query"):
+        query_embedding = await embed_query_async(query)
 
-    result = supabase.rpc(
+    # 2. Cari di in-process index; RPC Supabase dipakai sebagai fallback
+    if vector_index.is_ready():
+        with timed("vector_search"):
+            return vector_index.search(query_embedding, top_k, similarity_threshold)
+
+    with timed("vector_search_rpc"):
+        return await search_similar_services_rpc(query_embedding.tolist(), top_k, similarity_threshold)
+
+
+async def search_similar_services_rpc(
+    query_embedding: List[float],
+    top_k: int = 5,
+    similarity_threshold: float = 0.5
+) -> List[Dict[str, Any]]:
+    """Pencarian via RPC match_service_embeddings di Supabase."""
+    db = await get_async_supabase()
+    result = await db.rpc(
         'match_service_embeddings',
         {
-            'query_embedding': query_embedding_norm,
+            'query_embedding': query_embedding,
             'match_threshold': 1 - similarity_threshold,  # Convert similarity to distance
             'match_count': top_k
         }
@@ -36,13 +52,13 @@ def search_similar_services(
     return simplified_results
 
 
-def rag_pipeline(
+async def rag_pipeline(
     user_query: str,
     top_k: int = 5,
     similarity_threshold: float = 0.5
 ) -> Dict[str, Any]:
     # Search similar services
-    search_results = search_similar_services(
+    search_results = await search_similar_services(
         query=user_query,
         top_k=top_k,
         similarity_threshold=similarity_threshold
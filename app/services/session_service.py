@@ -1,32 +1,245 @@
 """
 Service untuk mengelola chat sessions dan conversation history.
+
+Pesan chat_history dan update last_activity ditulis secara write-behind:
+dimasukkan ke antrean in-memory lalu di-flush sebagai multi-row insert/upsert
+ketika antrean mencapai HISTORY_FLUSH_BATCH_SIZE atau setiap
+HISTORY_FLUSH_INTERVAL detik. Pembacaan history tetap melihat pesan yang
+belum di-flush.
+
+Session aktif beserta N pesan terakhirnya juga disimpan di LRU cache dengan
+TTL, dan last_activity ditulis paling banyak sekali per
+SESSION_ACTIVITY_INTERVAL detik per session. Dengan beberapa worker gunicorn,
+request satu session bisa jatuh ke worker mana saja, jadi pesan dan ringkasan
+tidak diambil dari cache (lihat SESSION_CACHE_HISTORY) dan ringkasan hanya
+ditulis jika lebih baru (summary_turns) dari yang ada di database.
+
+Konteks percakapan untuk LLM adalah ringkasan bergulir session (kolom
+chat_sessions.summary, lihat conversation_summary) plus pertukaran terakhir.
+Ringkasan diperbarui setelah setiap turn dan ditulis write-behind juga.
 """
+import asyncio
+import contextlib
+import os
+import time
+from collections import deque
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
-from app.database.client import supabase
+from app.database.client import get_async_supabase
+from app.services.conversation_summary import (CONVERSATION_SUMMARY_MODE,
+                                               fold_exchange,
+                                               format_last_answer,
+                                               format_last_question)
+from app.services.intent_service import NO_MATCH_REPLY, classify_intent
+from app.utils.cache import TTLCache
+from app.utils.metrics import timed
+
+HISTORY_FLUSH_BATCH_SIZE = int(os.getenv("HISTORY_FLUSH_BATCH_SIZE", "50"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5"))
+HISTORY_MAX_PENDING = int(os.getenv("HISTORY_MAX_PENDING", "5000"))
+
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "600"))
+SESSION_CACHE_MESSAGES = int(os.getenv("SESSION_CACHE_MESSAGES", "10"))
+SESSION_ACTIVITY_INTERVAL = float(os.getenv("SESSION_ACTIVITY_INTERVAL", "60"))
+# Cache pesan dan ringkasan per session hanya valid jika semua request session
+# ditangani satu proses. auto: aktif hanya jika WEB_CONCURRENCY <= 1 (gunicorn.conf.py
+# mengisi WEB_CONCURRENCY); dengan beberapa worker, history dan ringkasan dibaca dari database
+_cache_history_setting = os.getenv("SESSION_CACHE_HISTORY", "auto").lower()
+SESSION_CACHE_HISTORY = (
+    int(os.getenv("WEB_CONCURRENCY", "1")) <= 1
+    if _cache_history_setting == "auto" else _cache_history_setting == "true"
+)
+
+# session_id -> {"session": dict, "messages": deque | None, "complete": bool, "version": int, "activity_written_at": float}
+# messages None berarti history session belum pernah dibaca; complete True berarti
+# deque berisi seluruh history session (bukan hanya N pesan terakhir)
+_session_cache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL)
+
+_pending_messages: List[dict] = []
+# Pesan yang sedang di-insert (bisa sudah/ belum terlihat di database)
+_inflight_messages: List[dict] = []
+_pending_activity: Dict[str, str] = {}
+# session_id -> {"session_id", "summary", "summary_turns"} yang belum ditulis
+_pending_summaries: Dict[str, dict] = {}
+# session_id -> task ringkasan LLM terakhir; task berikutnya untuk session yang sama
+# menunggu task ini, sehingga pertukaran dilipat berurutan
+_summary_tasks: Dict[str, asyncio.Task] = {}
+_flush_lock: Optional[asyncio.Lock] = None
+_flush_wakeup: Optional[asyncio.Event] = None
+_writer_task: Optional[asyncio.Task] = None
+
+
+def _ensure_writer() -> None:
+    """Jalankan background writer di event loop saat ini (sekali saja)."""
+    global _flush_lock, _flush_wakeup, _writer_task
+    
+    if _writer_task is None or _writer_task.done():
+        _flush_lock = asyncio.Lock()
+        _flush_wakeup = asyncio.Event()
+        _writer_task = asyncio.get_running_loop().create_task(_writer_loop())
+
+
+async def _writer_loop() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_flush_wakeup.wait(), timeout=HISTORY_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _flush_wakeup.clear()
+        
+        if _pending_messages or _pending_activity or _pending_summaries:
+            try:
+                await flush_pending_writes()
+            except Exception as e:
+                # Writer harus tetap hidup; data yang gagal sudah dikembalikan ke antrean
+                print(f"Chat history writer error: {e}")
+
+
+async def flush_pending_writes() -> None:
+    """
+    Tulis semua pesan dan last_activity yang masih di antrean ke database.
+    Jika gagal, data dikembalikan ke antrean untuk dicoba lagi pada flush berikutnya.
+    """
+    global _pending_messages, _inflight_messages, _pending_activity, _pending_summaries
+    
+    if _flush_lock is None:
+        return
+    
+    async with _flush_lock:
+        # Client dibuat sebelum antrean diambil: jika gagal, antrean tetap utuh untuk flush berikutnya
+        try:
+            db = await get_async_supabase()
+        except Exception as e:
+            print(f"Failed to flush pending writes, database client unavailable: {e}")
+            return
+        
+        rows, _pending_messages = _pending_messages, []
+        activity, _pending_activity = _pending_activity, {}
+        summaries, _pending_summaries = _pending_summaries, {}
+        _inflight_messages = rows
+        
+        try:
+            if rows:
+                with timed("history_write"):
+                    await db.table("chat_history").insert(rows).execute()
+        except Exception as e:
+            print(f"Failed to flush {len(rows)} chat history rows: {e}")
+            # Kembalikan ke depan antrean, buang yang paling lama jika melebihi batas
+            _pending_messages = (rows + _pending_messages)[-HISTORY_MAX_PENDING:]
+        finally:
+            _inflight_messages = []
+        
+        if activity:
+            # UPDATE (bukan upsert): session yang sudah dihapus tidak boleh muncul lagi.
+            # Satu query per timestamp; session dengan timestamp sama digabung
+            by_timestamp: Dict[str, List[str]] = {}
+            for session_id, last_activity in activity.items():
+                by_timestamp.setdefault(last_activity, []).append(session_id)
+            with timed("session_activity_write"):
+                results = await asyncio.gather(*(
+                    db.table("chat_sessions").update(
+                        {"last_activity": last_activity}
+                    ).in_("session_id", session_ids).execute()
+                    for last_activity, session_ids in by_timestamp.items()
+                ), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                print(f"Failed to flush session activity for {len(errors)} timestamps: {errors[0]}")
+                for (last_activity, session_ids), result in zip(by_timestamp.items(), results):
+                    if isinstance(result, Exception):
+                        for session_id in session_ids:
+                            _pending_activity.setdefault(session_id, last_activity)
+        
+        if summaries:
+            # Hanya timpa ringkasan yang lebih lama (summary_turns lebih kecil), supaya
+            # ringkasan basi dari worker lain tidak menimpa yang lebih baru
+            with timed("session_summary_write"):
+                results = await asyncio.gather(*(
+                    db.table("chat_sessions").update(
+                        {"summary": row["summary"], "summary_turns": row["summary_turns"]}
+                    ).eq("session_id", session_id).lt("summary_turns", row["summary_turns"]).execute()
+                    for session_id, row in summaries.items()
+                ), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                print(f"Failed to flush conversation summaries for {len(errors)} sessions: {errors[0]}")
+                for (session_id, row), result in zip(summaries.items(), results):
+                    if isinstance(result, Exception):
+                        _pending_summaries.setdefault(session_id, row)
+
 
+async def shutdown_writer() -> None:
+    """
+    Hentikan background writer, tunggu ringkasan LLM yang masih berjalan, lalu
+    flush sisa antrean (dipanggil saat shutdown).
+    """
+    global _writer_task
+    
+    if _writer_task is not None:
+        _writer_task.cancel()
+        try:
+            await _writer_task
+        except asyncio.CancelledError:
+            pass
+        _writer_task = None
+    
+    # Ringkasan LLM yang masih berjalan menulis ke antrean; tunggu sebelum flush terakhir
+    if _summary_tasks:
+        await asyncio.gather(*list(_summary_tasks.values()), return_exceptions=True)
+    
+    await flush_pending_writes()
 
-def create_session() -> dict:
+
+def _unflushed_messages(session_id: UUID) -> List[dict]:
+    """Pesan session ini yang belum (pasti) tersimpan di database, urut kronologis."""
+    session_key = str(session_id)
+    return [
+        row for row in _inflight_messages + _pending_messages
+        if row["session_id"] == session_key
+    ]
+
+
+def _message_key(row: dict) -> tuple:
+    created_at = row.get("created_at")
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at).replace(tzinfo=None)
+        except ValueError:
+            pass
+    return row.get("role"), row.get("message"), created_at
+
+
+async def create_session() -> dict:
     """
     Buat session baru untuk user.
     
     Returns:
         dict: Session data dengan session_id
     """
-    response = supabase.table("chat_sessions").insert({
+    db = await get_async_supabase()
+    response = await db.table("chat_sessions").insert({
         "created_at": datetime.now().isoformat(),
         "last_activity": datetime.now().isoformat(),
         "is_active": True
     }).execute()
     
     if response.data and len(response.data) > 0:
-        return response.data[0]
+        session = response.data[0]
+        _session_cache.set(str(session["session_id"]), {
+            "session": session,
+            "messages": deque(maxlen=SESSION_CACHE_MESSAGES),
+            "complete": True,
+            "version": 0,
+            "activity_written_at": time.monotonic()
+        })
+        return session
     raise Exception("Failed to create session")
 
 
-def get_session(session_id: UUID) -> Optional[dict]:
+async def get_session(session_id: UUID) -> Optional[dict]:
     """
     Get session by ID.
     
@@ -36,36 +249,55 @@ def get_session(session_id: UUID) -> Optional[dict]:
     Returns:
         dict or None: Session data or None if not found
     """
-    response = supabase.table("chat_sessions").select("*").eq("session_id", str(session_id)).execute()
+    entry = _session_cache.get(str(session_id))
+    if entry is not None:
+        return entry["session"]
+    
+    db = await get_async_supabase()
+    with timed("session_fetch_db"):
+        response = await db.table("chat_sessions").select("*").eq("session_id", str(session_id)).execute()
     
     if response.data and len(response.data) > 0:
-        return response.data[0]
+        session = response.data[0]
+        _session_cache.set(str(session_id), {
+            "session": session,
+            "messages": None,
+            "complete": False,
+            "version": 0,
+            "activity_written_at": 0.0
+        })
+        return session
     return None
 
 
-def update_session_activity(session_id: UUID) -> bool:
+async def update_session_activity(session_id: UUID) -> bool:
     """
-    Update last_activity timestamp untuk session.
+    Update last_activity timestamp untuk session (write-behind).
+    Untuk session yang ada di cache, penulisan ke database digabung:
+    paling banyak sekali per SESSION_ACTIVITY_INTERVAL detik.
     
     Args:
         session_id: UUID of session
         
     Returns:
-        bool: True if updated successfully
+        bool: True jika update sudah masuk antrean atau digabung dengan update sebelumnya
     """
-    try:
-        response = supabase.table("chat_sessions").update({
-            "last_activity": datetime.now().isoformat()
-        }).eq("session_id", str(session_id)).execute()
-        
-        return response.data is not None and len(response.data) > 0
-    except Exception:
-        return False
+    now = datetime.now().isoformat()
+    entry = _session_cache.get(str(session_id))
+    if entry is not None:
+        entry["session"]["last_activity"] = now
+        if time.monotonic() - entry["activity_written_at"] < SESSION_ACTIVITY_INTERVAL:
+            return True
+        entry["activity_written_at"] = time.monotonic()
+    
+    _pending_activity[str(session_id)] = now
+    _ensure_writer()
+    return True
 
 
-def add_message_to_history(session_id: UUID, role: str, message: str, metadata: Optional[dict] = None) -> dict:
+async def add_message_to_history(session_id: UUID, role: str, message: str, metadata: Optional[dict] = None) -> dict:
     """
-    Tambah pesan ke chat history.
+    Tambah pesan ke chat history (write-behind, di-flush secara batch).
     
     Args:
         session_id: UUID of session
@@ -74,28 +306,43 @@ def add_message_to_history(session_id: UUID, role: str, message: str, metadata:
         metadata: Optional metadata (e.g., retrieved services)
         
     Returns:
-        dict: Inserted message data
+        dict: Message data yang masuk antrean
     """
+    # Semua baris dalam satu multi-row insert harus punya kolom yang sama
     data = {
         "session_id": str(session_id),
         "role": role,
         "message": message,
-        "created_at": datetime.now().isoformat()
+        "created_at": datetime.now().isoformat(),
+        "metadata": metadata or None
     }
     
-    if metadata:
-        data["metadata"] = metadata
+    _ensure_writer()
     
-    response = supabase.table("chat_history").insert(data).execute()
+    # Backpressure: antrean penuh berarti database tertinggal, flush dulu
+    if len(_pending_messages) >= HISTORY_MAX_PENDING:
+        await flush_pending_writes()
     
-    if response.data and len(response.data) > 0:
-        return response.data[0]
-    raise Exception("Failed to add message to history")
+    _pending_messages.append(data)
+    if len(_pending_messages) >= HISTORY_FLUSH_BATCH_SIZE:
+        _flush_wakeup.set()
+    
+    entry = _session_cache.get(str(session_id))
+    if entry is not None:
+        entry["version"] += 1
+    if entry is not None and entry["messages"] is not None:
+        if len(entry["messages"]) == entry["messages"].maxlen:
+            # pesan tertua akan terbuang dari deque
+            entry["complete"] = False
+        entry["messages"].append({"role": role, "message": message, "created_at": data["created_at"]})
+    
+    return data
 
 
-def get_conversation_history(session_id: UUID, limit: int = 10) -> List[dict]:
+async def get_conversation_history(session_id: UUID, limit: int = 10) -> List[dict]:
     """
-    Ambil conversation history untuk session (newest first).
+    Ambil conversation history untuk session (newest first),
+    termasuk pesan yang belum di-flush ke database.
     
     Args:
         session_id: UUID of session
@@ -104,26 +351,158 @@ def get_conversation_history(session_id: UUID, limit: int = 10) -> List[dict]:
     Returns:
         List[dict]: List of chat messages
     """
-    response = supabase.table("chat_history").select("role, message, created_at").eq(
-        "session_id", str(session_id)
-    ).order("created_at", desc=True).limit(limit).execute()
+    entry = _session_cache.get(str(session_id)) if SESSION_CACHE_HISTORY else None
+    if entry is not None and entry["messages"] is not None:
+        cached = entry["messages"]
+        if entry["complete"] or len(cached) >= limit:
+            return [dict(msg) for msg in reversed(cached)][:limit]
+    
+    version = entry["version"] if entry is not None else None
+    
+    # Ambil snapshot antrean sebelum query, supaya pesan yang ter-flush di tengah
+    # query tetap terlihat (dari database atau dari snapshot ini)
+    unflushed = _unflushed_messages(session_id)
+    
+    db = await get_async_supabase()
+    with timed("history_fetch_db"):
+        response = await db.table("chat_history").select("role, message, created_at").eq(
+            "session_id", str(session_id)
+        ).order("created_at", desc=True).limit(limit).execute()
+    
+    messages = response.data if response.data else []
+    if unflushed:
+        stored_keys = {_message_key(msg) for msg in messages}
+        pending = [
+            {"role": row["role"], "message": row["message"], "created_at": row["created_at"]}
+            for row in reversed(unflushed)
+            if _message_key(row) not in stored_keys
+        ]
+        messages = (pending + messages)[:limit]
+    
+    # Jangan isi cache jika ada pesan baru selama query berjalan
+    if entry is not None and entry["version"] == version:
+        entry["messages"] = deque(reversed(messages), maxlen=SESSION_CACHE_MESSAGES)
+        entry["complete"] = len(messages) < limit and len(messages) <= SESSION_CACHE_MESSAGES
     
-    return response.data if response.data else []
+    return messages
 
 
-def get_recent_context(session_id: UUID, limit: int = 5) -> str:
+async def get_conversation_summary(session_id: UUID) -> Tuple[str, int]:
     """
-    Ambil recent conversation context untuk LLM (format string).
-    Returns messages in chronological order (oldest first) untuk context.
+    Ringkasan bergulir session, termasuk yang belum di-flush.
+    
+    Returns:
+        tuple: (ringkasan, jumlah pertukaran yang sudah dilipat)
+    """
+    pending = _pending_summaries.get(str(session_id))
+    if pending is not None:
+        return pending["summary"], pending["summary_turns"]
+    
+    if SESSION_CACHE_HISTORY:
+        session = await get_session(session_id)
+    else:
+        # Worker lain bisa sudah memperbarui ringkasan; session di cache tidak dipakai
+        db = await get_async_supabase()
+        with timed("session_summary_fetch_db"):
+            response = await db.table("chat_sessions").select("summary, summary_turns").eq(
+                "session_id", str(session_id)
+            ).execute()
+        session = response.data[0] if response.data else None
+    if not session:
+        return "", 0
+    return session.get("summary") or "", session.get("summary_turns") or 0
+
+
+def _store_summary(session_id: UUID, summary: str, turns: int) -> None:
+    session_key = str(session_id)
+    entry = _session_cache.get(session_key)
+    if entry is not None:
+        entry["session"]["summary"] = summary
+        entry["session"]["summary_turns"] = turns
+    
+    _pending_summaries[session_key] = {"session_id": session_key, "summary": summary, "summary_turns": turns}
+    _ensure_writer()
+
+
+async def _fold_with_llm(
+    session_id: UUID,
+    question: str,
+    answer: str,
+    config,
+    previous: Optional[asyncio.Task]
+) -> None:
+    from app.services.llm_service import generate_conversation_summary
+    
+    # Ringkasan dibaca setelah task sebelumnya untuk session ini selesai menyimpan hasilnya
+    if previous is not None:
+        await asyncio.gather(previous, return_exceptions=True)
+    summary, turns = await get_conversation_summary(session_id)
+    
+    try:
+        new_summary = await generate_conversation_summary(summary, question, answer, config)
+    except Exception as e:
+        print(f"Failed to summarize conversation with LLM, using extractive summary: {e}")
+        new_summary = fold_exchange(summary, question, answer)
+    _store_summary(session_id, new_summary, turns + 1)
+
+
+async def update_conversation_summary(session_id: UUID, config=None) -> None:
+    """
+    Lipat pertukaran sebelum turn terakhir ke ringkasan session. Dipanggil
+    setelah jawaban asisten disimpan; pertukaran terakhir sendiri tetap ikut
+    apa adanya di konteks turn berikutnya.
+    
+    Args:
+        session_id: UUID of session
+        config: Snapshot AI config (hanya untuk CONVERSATION_SUMMARY_MODE=llm)
+    """
+    if CONVERSATION_SUMMARY_MODE == "off":
+        return
+    
+    try:
+        # Newest first: [jawaban, pertanyaan, jawaban sebelumnya, pertanyaan sebelumnya]
+        messages = await get_conversation_history(session_id, 4)
+        if len(messages) < 4 or messages[3]["role"] != "user" or messages[2]["role"] != "assistant":
+            return
+        question, answer = messages[3]["message"], messages[2]["message"]
+        if classify_intent(question) is not None or answer == NO_MATCH_REPLY:
+            # Basa-basi dan balasan template tidak membawa informasi untuk ringkasan
+            return
+        
+        if CONVERSATION_SUMMARY_MODE == "llm":
+            # Jangan tahan response; ringkasan cukup siap sebelum turn berikutnya
+            session_key = str(session_id)
+            task = asyncio.get_running_loop().create_task(
+                _fold_with_llm(session_id, question, answer, config, _summary_tasks.get(session_key))
+            )
+            _summary_tasks[session_key] = task
+            task.add_done_callback(
+                lambda done: _summary_tasks.pop(session_key, None) if _summary_tasks.get(session_key) is done else None
+            )
+        else:
+            summary, turns = await get_conversation_summary(session_id)
+            _store_summary(session_id, fold_exchange(summary, question, answer), turns + 1)
+    except Exception as e:
+        print(f"Failed to update conversation summary: {e}")
+
+
+async def get_recent_context(session_id: UUID, limit: int = 5) -> str:
+    """
+    Ambil conversation context untuk LLM (format string): ringkasan bergulir
+    session plus pertukaran terakhir, sehingga ukurannya tetap terbatas.
+    Dengan CONVERSATION_SUMMARY_MODE=off, `limit` pesan terakhir dipakai apa adanya.
     
     Args:
         session_id: UUID of session
-        limit: Number of recent messages to include
+        limit: Number of recent messages to include (hanya untuk mode off)
         
     Returns:
         str: Formatted conversation context
     """
-    messages = get_conversation_history(session_id, limit)
+    if CONVERSATION_SUMMARY_MODE == "off":
+        messages = await get_conversation_history(session_id, limit)
+    else:
+        messages = await get_conversation_history(session_id, 2)
     
     if not messages:
         return ""
@@ -132,14 +511,25 @@ def get_recent_context(session_id: UUID, limit: int = 5) -> str:
     messages.reverse()
     
     context_lines = []
+    if CONVERSATION_SUMMARY_MODE != "off":
+        summary, _ = await get_conversation_summary(session_id)
+        if summary:
+            context_lines.append(f"Ringkasan percakapan sebelumnya:\n{summary}\n\nPertukaran terakhir:")
+    
     for msg in messages:
         role_label = "Pengguna" if msg["role"] == "user" else "Asisten"
-        context_lines.append(f"{role_label}: {msg['message']}")
+        if CONVERSATION_SUMMARY_MODE == "off":
+            text = msg["message"]
+        elif msg["role"] == "user":
+            text = format_last_question(msg["message"])
+        else:
+            text = format_last_answer(msg["message"])
+        context_lines.append(f"{role_label}: {text}")
     
     return "\n".join(context_lines)
 
 
-def get_session_info(session_id: UUID) -> Optional[dict]:
+async def get_session_info(session_id: UUID) -> Optional[dict]:
     """
     Get session info with total messages count.
     
@@ -149,16 +539,22 @@ def get_session_info(session_id: UUID) -> Optional[dict]:
     Returns:
         dict or None: Session info with total_messages
     """
-    session = get_session(session_id)
+    session = await get_session(session_id)
     if not session:
         return None
     
-    # Count total messages
-    response = supabase.table("chat_history").select("id", count="exact").eq(
-        "session_id", str(session_id)
-    ).execute()
+    # Count total messages. Dihitung di bawah _flush_lock: tidak ada batch inflight
+    # yang bisa sudah tersimpan sekaligus masih di antrean, jadi setiap pesan
+    # terhitung tepat sekali (di database atau di _pending_messages)
+    db = await get_async_supabase()
+    async with _flush_lock or contextlib.nullcontext():
+        response = await db.table("chat_history").select("id", count="exact").eq(
+            "session_id", str(session_id)
+        ).execute()
+        session_key = str(session_id)
+        pending = sum(1 for row in _pending_messages if row["session_id"] == session_key)
     
-    total_messages = response.count if response.count else 0
+    total_messages = (response.count if response.count else 0) + pending
     
     return {
         **session,
@@ -166,7 +562,7 @@ def get_session_info(session_id: UUID) -> Optional[dict]:
     }
 
 
-def cleanup_inactive_sessions() -> int:
+async def cleanup_inactive_sessions() -> int:
     """
     Cleanup sessions yang tidak aktif lebih dari 24 jam.
     
@@ -174,7 +570,8 @@ def cleanup_inactive_sessions() -> int:
         int: Number of sessions cleaned up
     """
     try:
-        response = supabase.rpc("cleanup_inactive_sessions").execute()
+        db = await get_async_supabase()
+        response = await db.rpc("cleanup_inactive_sessions").execute()
         return response.data if response.data else 0
     except Exception:
         return 0
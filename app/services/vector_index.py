@@ -0,0 +1,265 @@
+"""
+In-process vector index untuk service embeddings.
+
+Semua embedding dari tabel `service_embeddings` dimuat ke satu matrix float32
+contiguous (N x D). Karena embedding sudah L2-normalized, cosine similarity
+cukup dihitung dengan satu matmul, lalu top-k diambil dengan `argpartition`.
+Index diperbarui setiap kali layanan dibuat, diubah, atau dihapus di proses
+ini. Perubahan dari proses lain (worker lain, edit langsung di database)
+diambil oleh `sync_index` dengan membandingkan content_hash.
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.database.client import supabase
+from app.services.embedding_service import compute_content_hash
+
+# "local" = cari di memori (default), "rpc" = selalu pakai match_service_embeddings
+VECTOR_SEARCH_MODE = os.getenv("VECTOR_SEARCH_MODE", "local").lower()
+
+_PAGE_SIZE = 1000
+
+_lock = threading.Lock()
+_service_ids: List[str] = []
+_contents: List[str] = []
+_matrix: np.ndarray = np.empty((0, 0), dtype=np.float32)
+_loaded = False
+
+
+def _to_vector(embedding: Any) -> np.ndarray:
+    """pgvector dikembalikan PostgREST sebagai string '[...]'."""
+    if isinstance(embedding, str):
+        embedding = json.loads(embedding)
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def _fetch_all_embeddings() -> List[Dict[str, Any]]:
+    """Ambil semua baris service_embeddings (paginated, PostgREST membatasi jumlah baris)."""
+    rows: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        result = supabase.table("service_embeddings").select(
+            "service_id, content, embedding"
+        ).range(start, start + _PAGE_SIZE - 1).execute()
+        batch = result.data or []
+        rows.extend(batch)
+        if len(batch) < _PAGE_SIZE:
+            return rows
+        start += _PAGE_SIZE
+
+
+def _fetch_content_hashes() -> Dict[str, str]:
+    """service_id -> content_hash untuk semua baris (tanpa kolom embedding)."""
+    hashes: Dict[str, str] = {}
+    start = 0
+    while True:
+        result = supabase.table("service_embeddings").select(
+            "service_id, content_hash"
+        ).range(start, start + _PAGE_SIZE - 1).execute()
+        batch = result.data or []
+        for row in batch:
+            hashes[str(row["service_id"])] = row.get("content_hash")
+        if len(batch) < _PAGE_SIZE:
+            return hashes
+        start += _PAGE_SIZE
+
+
+def load_index() -> int:
+    """
+    Muat ulang seluruh index dari database.
+
+    Returns:
+        int: Jumlah embedding yang dimuat
+    """
+    global _service_ids, _contents, _matrix, _loaded
+
+    rows = _fetch_all_embeddings()
+    ids = [str(row["service_id"]) for row in rows]
+    contents = [row.get("content") or "" for row in rows]
+    if rows:
+        matrix = np.ascontiguousarray(np.vstack([_to_vector(row["embedding"]) for row in rows]))
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+
+    with _lock:
+        _service_ids, _contents, _matrix = ids, contents, matrix
+        _loaded = True
+
+    return len(ids)
+
+
+def _changed_unhashed(service_ids: List[str], local: Dict[str, str]) -> List[str]:
+    """
+    Baris tanpa content_hash (ditulis di luar aplikasi, atau sebelum backfill
+    migration 002) dibandingkan lewat kolom content-nya.
+    """
+    changed = []
+    for start in range(0, len(service_ids), _PAGE_SIZE):
+        rows = supabase.table("service_embeddings").select(
+            "service_id, content"
+        ).in_("service_id", service_ids[start:start + _PAGE_SIZE]).execute().data or []
+        changed.extend(
+            str(row["service_id"]) for row in rows
+            if (row.get("content") or "") != local.get(str(row["service_id"]))
+        )
+    return changed
+
+
+def sync_index() -> Tuple[List[str], List[str]]:
+    """
+    Samakan index dengan database tanpa memuat ulang semuanya: hanya baris
+    yang content_hash-nya berbeda (atau baru, atau tanpa hash dengan content
+    yang berbeda) yang diambil embedding-nya.
+    Matrix hanya disalin bila ada perubahan, jadi worker hasil fork tetap
+    berbagi halaman memori index dengan master selama data tidak berubah.
+
+    Returns:
+        (service_id yang ditambah/diubah, service_id yang dihapus)
+    """
+    if not _loaded:
+        load_index()
+        return [], []
+
+    remote = _fetch_content_hashes()
+    with _lock:
+        local = dict(zip(_service_ids, _contents))
+
+    changed = [
+        service_id for service_id, content_hash in remote.items()
+        if service_id not in local
+        or (content_hash and compute_content_hash(local[service_id]) != content_hash)
+    ]
+    changed += _changed_unhashed(
+        [service_id for service_id, content_hash in remote.items() if not content_hash and service_id in local],
+        local
+    )
+    removed = [service_id for service_id in local if service_id not in remote]
+
+    for start in range(0, len(changed), _PAGE_SIZE):
+        rows = supabase.table("service_embeddings").select(
+            "service_id, content, embedding"
+        ).in_("service_id", changed[start:start + _PAGE_SIZE]).execute().data or []
+        if rows:
+            upsert_many(
+                [str(row["service_id"]) for row in rows],
+                [row.get("content") or "" for row in rows],
+                [_to_vector(row["embedding"]) for row in rows]
+            )
+    for service_id in removed:
+        remove(service_id)
+
+    return changed, removed
+
+
+def is_ready() -> bool:
+    """True jika index sudah dimuat dan mode pencarian lokal aktif."""
+    return _loaded and VECTOR_SEARCH_MODE == "local"
+
+
+def size() -> int:
+    return len(_service_ids)
+
+
+def upsert(service_id: str, content: str, embedding: Sequence[float]) -> None:
+    """Tambah atau ganti embedding untuk satu layanan."""
+    upsert_many([service_id], [content], [embedding])
+
+
+def upsert_many(
+    service_ids: Sequence[str],
+    contents: Sequence[str],
+    embeddings: Sequence[Sequence[float]]
+) -> None:
+    """
+    Tambah atau ganti embedding untuk banyak layanan sekaligus.
+
+    Array lama tidak dimodifikasi (copy-on-write), sehingga pencarian yang
+    sedang berjalan tetap memakai snapshot yang konsisten.
+    """
+    global _service_ids, _contents, _matrix
+
+    if not _loaded or not service_ids:
+        return
+
+    new_vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(service_ids), -1)
+
+    with _lock:
+        ids = list(_service_ids)
+        contents_copy = list(_contents)
+        matrix = _matrix.copy() if _matrix.size else np.empty((0, new_vectors.shape[1]), dtype=np.float32)
+        positions = {sid: idx for idx, sid in enumerate(ids)}
+
+        appended = []
+        for row, (service_id, content) in enumerate(zip(service_ids, contents)):
+            service_id = str(service_id)
+            idx = positions.get(service_id)
+            if idx is None:
+                positions[service_id] = len(ids)
+                ids.append(service_id)
+                contents_copy.append(content)
+                appended.append(new_vectors[row])
+            else:
+                contents_copy[idx] = content
+                matrix[idx] = new_vectors[row]
+
+        if appended:
+            matrix = np.vstack([matrix, np.asarray(appended, dtype=np.float32)])
+
+        _service_ids, _contents, _matrix = ids, contents_copy, np.ascontiguousarray(matrix)
+
+
+def remove(service_id: str) -> None:
+    """Hapus embedding layanan dari index."""
+    global _service_ids, _contents, _matrix
+
+    service_id = str(service_id)
+    with _lock:
+        if service_id not in _service_ids:
+            return
+        idx = _service_ids.index(service_id)
+        _service_ids = _service_ids[:idx] + _service_ids[idx + 1:]
+        _contents = _contents[:idx] + _contents[idx + 1:]
+        _matrix = np.ascontiguousarray(np.delete(_matrix, idx, axis=0))
+
+
+def search(
+    query_embedding: Sequence[float],
+    top_k: int = 5,
+    similarity_threshold: float = 0.5
+) -> List[Dict[str, Any]]:
+    """
+    Cari layanan paling mirip dengan query embedding (sudah normalized).
+
+    Returns:
+        List[dict]: service_id, content, similarity (urut dari yang tertinggi)
+    """
+    with _lock:
+        ids, contents, matrix = _service_ids, _contents, _matrix
+
+    if not ids or top_k <= 0:
+        return []
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    scores = matrix @ query
+
+    k = min(top_k, len(ids))
+    if k < len(ids):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(ids))
+    candidates = candidates[np.argsort(-scores[candidates])]
+
+    return [
+        {
+            "service_id": ids[idx],
+            "content": contents[idx],
+            "similarity": float(scores[idx])
+        }
+        for idx in candidates
+        if scores[idx] >= similarity_threshold
+    ]
+
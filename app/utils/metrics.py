@@ -0,0 +1,205 @@
+"""
+Metrics in-process ringan: histogram latency per stage request, dan
+histogram ukuran prompt (token) per bagian prompt.
+
+Setiap stage punya bucket kumulatif (untuk format teks Prometheus) dan
+reservoir sampel terbaru (untuk p50/p95/p99 di dashboard). Metrics disimpan
+per proses: dengan beberapa worker gunicorn, setiap worker punya histogram
+sendiri (lihat gunicorn.conf.py).
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+METRICS_RESERVOIR_SIZE = int(os.getenv("METRICS_RESERVOIR_SIZE", "1024"))
+
+# Batas bucket dalam detik (dari cache hit sampai generasi LLM yang lambat)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# Batas bucket jumlah token (ukuran prompt dan jumlah token yang dipotong)
+TOKEN_BUCKETS = (0, 50, 100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000, 20000)
+
+_PROCESS_START = time.time()
+
+
+class Histogram:
+    """
+    Histogram thread-safe untuk satu stage.
+
+    Args:
+        buckets: Batas atas bucket (detik, atau token untuk histogram ukuran prompt), urut naik
+        reservoir_size: Jumlah sampel terbaru yang disimpan untuk percentile
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, reservoir_size: int = METRICS_RESERVOIR_SIZE):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=reservoir_size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        idx = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            if idx < len(self.bucket_counts):
+                self.bucket_counts[idx] += 1
+            self.count += 1
+            self.sum += seconds
+            self._recent.append(seconds)
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)) -> Dict[float, Optional[float]]:
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return {q: None for q in quantiles}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in quantiles}
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """(bucket kumulatif, count, sum) yang konsisten satu sama lain."""
+        with self._lock:
+            counts, count, total_seconds = list(self.bucket_counts), self.count, self.sum
+        cumulative, total = [], 0
+        for bucket_count in counts:
+            total += bucket_count
+            cumulative.append(total)
+        return cumulative, count, total_seconds
+
+
+_registry_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_token_histograms: Dict[str, Histogram] = {}
+
+
+def get_histogram(stage: str) -> Histogram:
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _histograms.setdefault(stage, Histogram())
+    return histogram
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Catat durasi (detik) untuk stage."""
+    get_histogram(stage).observe(seconds)
+
+
+def observe_tokens(part: str, tokens: int) -> None:
+    """Catat jumlah token untuk satu bagian prompt (mis. "prompt", "context_cut")."""
+    histogram = _token_histograms.get(part)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _token_histograms.setdefault(part, Histogram(TOKEN_BUCKETS))
+    histogram.observe(tokens)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Ukur durasi blok kode (juga blok yang berisi `await`).
+
+    Contoh:
+        with timed("vector_search"):
+            results = vector_index.search(...)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def get_uptime_seconds() -> float:
+    return time.time() - _PROCESS_START
+
+
+def format_uptime() -> str:
+    return str(timedelta(seconds=int(get_uptime_seconds())))
+
+
+def get_latency_summary() -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Ringkasan latency per stage dalam milidetik.
+
+    Returns:
+        Dict stage -> count, mean_ms, p50_ms, p95_ms, p99_ms
+    """
+    summary = {}
+    to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    with _registry_lock:
+        histograms = sorted(_histograms.items())
+    for stage, histogram in histograms:
+        _, count, total_seconds = histogram.snapshot()
+        p = histogram.percentiles()
+        summary[stage] = {
+            "count": count,
+            "mean_ms": to_ms(total_seconds / count) if count else None,
+            "p50_ms": to_ms(p[0.5]),
+            "p95_ms": to_ms(p[0.95]),
+            "p99_ms": to_ms(p[0.99])
+        }
+    return summary
+
+
+def get_token_summary() -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Ringkasan ukuran prompt per bagian.
+
+    Returns:
+        Dict part -> count, mean, p50, p95, p99 (token)
+    """
+    summary = {}
+    with _registry_lock:
+        histograms = sorted(_token_histograms.items())
+    for part, histogram in histograms:
+        _, count, total = histogram.snapshot()
+        p = histogram.percentiles()
+        summary[part] = {
+            "count": count,
+            "mean": round(total / count, 1) if count else None,
+            "p50": p[0.5],
+            "p95": p[0.95],
+            "p99": p[0.99]
+        }
+    return summary
+
+
+def render_prometheus() -> str:
+    """Semua metrics dalam format teks Prometheus (exposition format 0.0.4)."""
+    lines = [
+        "# HELP chatbot_process_uptime_seconds Process uptime in seconds.",
+        "# TYPE chatbot_process_uptime_seconds gauge",
+        f'chatbot_process_uptime_seconds{{pid="{os.getpid()}"}} {get_uptime_seconds():.3f}',
+        "# HELP chatbot_stage_duration_seconds Request stage latency in seconds.",
+        "# TYPE chatbot_stage_duration_seconds histogram"
+    ]
+    with _registry_lock:
+        histograms = sorted(_histograms.items())
+    for stage, histogram in histograms:
+        cumulative, count, total_seconds = histogram.snapshot()
+        for bound, bucket_count in zip(histogram.buckets, cumulative):
+            lines.append(f'chatbot_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {bucket_count}')
+        lines.append(f'chatbot_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+        lines.append(f'chatbot_stage_duration_seconds_sum{{stage="{stage}"}} {total_seconds:.6f}')
+        lines.append(f'chatbot_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+    with _registry_lock:
+        token_histograms = sorted(_token_histograms.items())
+    if token_histograms:
+        lines.append("# HELP chatbot_prompt_tokens Estimated prompt size and tokens cut per request, by part.")
+        lines.append("# TYPE chatbot_prompt_tokens histogram")
+    for part, histogram in token_histograms:
+        cumulative, count, total = histogram.snapshot()
+        for bound, bucket_count in zip(histogram.buckets, cumulative):
+            lines.append(f'chatbot_prompt_tokens_bucket{{part="{part}",le="{bound}"}} {bucket_count}')
+        lines.append(f'chatbot_prompt_tokens_bucket{{part="{part}",le="+Inf"}} {count}')
+        lines.append(f'chatbot_prompt_tokens_sum{{part="{part}"}} {total}')
+        lines.append(f'chatbot_prompt_tokens_count{{part="{part}"}} {count}')
+    return "\n".join(lines) + "\n"
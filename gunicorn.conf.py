@@ -0,0 +1,68 @@
+"""
+Konfigurasi gunicorn untuk mode multi-worker (Procfile):
+
+    gunicorn main:app -c gunicorn.conf.py
+
+Master meng-import aplikasi (preload_app) lalu memuat model embedding dan
+vector index sebelum fork. Worker mewarisi array read-only tersebut secara
+copy-on-write, sehingga memori model tidak berlipat sebanyak jumlah worker.
+Setiap worker tetap menjalankan lifespan sendiri (client Supabase, SDK Gemini,
+sinkronisasi vector index) dan punya readiness probe sendiri di GET /ready.
+
+Request satu session bisa ditangani worker mana saja. Cache pesan dan ringkasan
+per session di session_service hanya dipakai jika WEB_CONCURRENCY <= 1. Metrics
+juga per worker: GET /metrics hanya berisi histogram worker yang menjawab request
+itu (label pid di chatbot_process_uptime_seconds), jadi untuk angka agregat
+jalankan WEB_CONCURRENCY=1 atau jumlahkan hasil scrape per worker.
+
+Reload tanpa downtime:
+    kill -HUP <pid master>    worker diganti bertahap; kode dan model tetap milik master
+    kill -USR2 <pid master>   jalankan master baru (kode/model baru), lalu
+                              kill -QUIT <pid master lama> setelah worker baru /ready
+"""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Dibaca aplikasi (session_service.SESSION_CACHE_HISTORY): dengan beberapa worker,
+# cache history/ringkasan per session dimatikan karena session tidak terikat ke satu worker
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Waktu bagi worker untuk menyelesaikan request berjalan dan flush chat history saat reload/stop
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Daur ulang worker setelah N request (0 = nonaktif); worker baru di-fork ulang dari master
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+
+
+def on_starting(server):
+    """Dijalankan di master setelah preload, sebelum worker pertama di-fork."""
+    from app.services import embedding_service, vector_index
+
+    embedding_service.get_embeddings_model()
+    if vector_index.VECTOR_SEARCH_MODE == "local":
+        try:
+            count = vector_index.load_index()
+            server.log.info("Vector index loaded in master: %d embeddings", count)
+        except Exception as e:
+            server.log.warning("Failed to load vector index in master, workers will load it: %s", e)
+
+    # Objek yang sudah ada dipindah ke generasi permanen: GC di worker tidak lagi
+    # menulis ke header objek ini, jadi halaman memorinya tidak ikut tersalin
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Koneksi HTTP client Supabase milik master tidak boleh dipakai bersama antar proses
+    from app.database.client import reset_clients
+
+    reset_clients()
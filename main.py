@@ -1,14 +1,102 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api import (ai_config_router, auth_router, chat_router,
                      dashboard_router)
 from app.api import mpp_service_router as service
 from app.api import user_chat_router
+from app.database.client import get_supabase
+from app.services import (answer_cache, embedding_service, fast_path,
+                          session_service, vector_index)
+from app.services.dashboard_service import invalidate_dashboard_cache
+from app.utils import metrics
+
+# Dependency berat (model embedding, SDK Gemini, client Supabase) tidak dimuat saat import.
+# background: dimuat di thread setelah startup, /ready 503 sampai selesai (default)
+# blocking: startup menunggu warmup selesai
+# off: semua dimuat saat pertama dipakai, /ready langsung 200
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+# Interval (detik) sinkronisasi vector index dengan database, untuk perubahan dari
+# worker lain atau edit langsung di database; 0 = nonaktif
+VECTOR_INDEX_SYNC_INTERVAL = float(os.getenv("VECTOR_INDEX_SYNC_INTERVAL", "60"))
+
+_startup = {"ready": False, "error": None}
+
+
+def _load_vector_index() -> None:
+    # Muat vector index ke memori; jika gagal, pencarian fallback ke RPC Supabase.
+    # Di worker gunicorn index sudah dimuat master sebelum fork (gunicorn.conf.py).
+    if vector_index.VECTOR_SEARCH_MODE == "local" and not vector_index.is_ready():
+        try:
+            with metrics.timed("startup_vector_index"):
+                vector_index.load_index()
+        except Exception as e:
+            print(f"Failed to load vector index, falling back to RPC search: {e}")
+
+
+def _warmup() -> None:
+    with metrics.timed("startup_embedding_model"):
+        embedding_service.get_embeddings_model()
+    with metrics.timed("startup_supabase_client"):
+        get_supabase()
+    with metrics.timed("startup_llm_sdk"):
+        import google.generativeai  # noqa: F401
+    _load_vector_index()
+
+
+async def _run_warmup() -> None:
+    try:
+        await asyncio.to_thread(_warmup)
+        _startup["ready"] = True
+    except Exception as e:
+        _startup["error"] = str(e)
+        print(f"Startup warmup failed: {e}")
+
+
+async def _sync_vector_index_periodically() -> None:
+    while True:
+        await asyncio.sleep(VECTOR_INDEX_SYNC_INTERVAL)
+        try:
+            with metrics.timed("vector_index_sync"):
+                changed, removed = await asyncio.to_thread(vector_index.sync_index)
+            if changed or removed:
+                answer_cache.invalidate_services(changed + removed)
+                fast_path.invalidate_services(changed + removed)
+                invalidate_dashboard_cache("knowledge_base")
+        except Exception as e:
+            print(f"Failed to sync vector index: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if STARTUP_WARMUP == "blocking":
+        await _run_warmup()
+    elif STARTUP_WARMUP == "off":
+        _startup["ready"] = True
+        tasks.append(asyncio.create_task(asyncio.to_thread(_load_vector_index)))
+    else:
+        tasks.append(asyncio.create_task(_run_warmup()))
+    if vector_index.VECTOR_SEARCH_MODE == "local" and VECTOR_INDEX_SYNC_INTERVAL > 0:
+        tasks.append(asyncio.create_task(_sync_vector_index_periodically()))
+    yield
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    # Tulis sisa antrean chat history sebelum proses berhenti
+    await session_service.shutdown_writer()
+
 
 app = FastAPI(
     title="Chatbot RAG Sewakadharma",
     description="Chatbot layanan publik Kota Denpasar dengan RAG & Gemini",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -19,6 +107,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Pakai path template route (bukan URL mentah) supaya jumlah stage tetap kecil
+    route = request.scope.get("route")
+    if route is not None:
+        metrics.observe(f"http {request.method} {route.path}", time.perf_counter() - start)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    """Readiness probe per worker: 503 selama warmup worker ini belum selesai (atau gagal)."""
+    if _startup["ready"]:
+        return {"status": "ready", "pid": os.getpid()}
+    status = "failed" if _startup["error"] else "warming_up"
+    return JSONResponse({"status": status, "error": _startup["error"], "pid": os.getpid()}, status_code=503)
+
+
 @app.get("/", include_in_schema=False)
 def root():
     return {
@@ -0,0 +1,128 @@
+"""
+Ukur cold start dan memori per worker untuk model embedding: dimuat lewat
+AutoEmbeddings (Hugging Face) vs artefak lokal memory-mapped
+(EMBEDDING_MODEL_PATH, lihat scripts/export_embedding_model.py).
+
+Beberapa proses worker dijalankan bersamaan. Setiap worker memuat
+embedding_service, menjalankan embed_query pertama, lalu melaporkan RSS
+dan PSS (Linux, /proc/self/smaps_rollup) selagi semua worker masih hidup.
+PSS membagi halaman bersama (mis. mmap file yang sama) ke semua proses
+yang memakainya, sehingga memperlihatkan biaya memori sebenarnya per worker.
+
+Contoh:
+    python scripts/export_embedding_model.py --output models/embedding
+    python scripts/benchmarks/cold_start.py --model-path models/embedding --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+WORKER_CODE = r"""
+import json, sys, time
+start = time.perf_counter()
+from app.services import embedding_service
+embedding_service.get_embeddings_model()
+loaded = time.perf_counter()
+embedding_service.embed_query("apa saja persyaratan pembuatan akta kelahiran")
+first_query = time.perf_counter()
+if "--touch-all" in sys.argv:
+    # Sentuh seluruh tabel embedding (kondisi setelah banyak query berbeda)
+    float(embedding_service.get_embeddings_model().model.embedding.sum())
+print(json.dumps({"import_s": loaded - start, "first_query_s": first_query - loaded}), flush=True)
+sys.stdin.readline()
+
+def memory():
+    values = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Private_Clean:", "Private_Dirty:"):
+                    values[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    except OSError:
+        import resource
+        values["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return values
+
+print(json.dumps(memory()), flush=True)
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", help="Direktori artefak lokal (mode mmap)")
+    parser.add_argument("--workers", type=int, default=4, help="Jumlah worker bersamaan per mode")
+    parser.add_argument("--touch-all", action="store_true", help="Sentuh seluruh tabel embedding di setiap worker")
+    parser.add_argument("--json", help="Tulis hasil ke file JSON")
+    return parser.parse_args()
+
+
+def run_mode(name: str, env: dict, workers: int, touch_all: bool) -> dict:
+    argv = [sys.executable, "-c", WORKER_CODE] + (["--touch-all"] if touch_all else [])
+    procs = [
+        subprocess.Popen(argv, cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+
+    def read(proc) -> dict:
+        line = proc.stdout.readline()
+        if not line:
+            raise SystemExit(f"Worker for mode '{name}' exited early (exit code {proc.wait()})")
+        return json.loads(line)
+
+    try:
+        timings = [read(proc) for proc in procs]
+        for proc in procs:
+            proc.stdin.write("\n")
+            proc.stdin.flush()
+        memory = [read(proc) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait(timeout=60)
+
+    def summarize(rows, key):
+        values = [row[key] for row in rows if key in row]
+        return round(statistics.median(values), 3) if values else None
+
+    return {
+        "mode": name,
+        "workers": workers,
+        "import_s": summarize(timings, "import_s"),
+        "first_query_s": summarize(timings, "first_query_s"),
+        "rss_mb": summarize(memory, "rss"),
+        "pss_mb": summarize(memory, "pss"),
+        "shared_clean_mb": summarize(memory, "shared_clean"),
+        "private_mb": round(summarize(memory, "private_clean") + summarize(memory, "private_dirty"), 3)
+        if summarize(memory, "private_dirty") is not None else None,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+
+    base_env = {key: value for key, value in os.environ.items() if key != "EMBEDDING_MODEL_PATH"}
+    modes = [("hub", base_env)]
+    if args.model_path:
+        modes.append(("mmap", {**base_env, "EMBEDDING_MODEL_PATH": os.path.abspath(args.model_path)}))
+
+    results = [run_mode(name, env, args.workers, args.touch_all) for name, env in modes]
+
+    print(f"\n{'mode':<8}{'import s':>10}{'1st query s':>13}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}")
+    for row in results:
+        print(f"{row['mode']:<8}{row['import_s']:>10}{row['first_query_s']:>13}{row['rss_mb']:>10}"
+              f"{str(row['pss_mb']):>10}{str(row['shared_clean_mb']):>11}{str(row['private_mb']):>12}")
+    print(f"\n(median per worker, {args.workers} workers running concurrently)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
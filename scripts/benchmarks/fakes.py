@@ -0,0 +1,465 @@
+"""
+Stand-in lokal untuk Supabase, Gemini, dan model embedding, dipakai oleh
+script benchmark supaya pipeline `main:app` bisa diukur tanpa layanan eksternal.
+
+Pemakaian (harus dipanggil SEBELUM modul `app` / `main` di-import):
+
+    db = FakeDatabase(latency_ms=5)
+    install_fakes(db, llm=FakeLLMSettings(first_token_ms=300, tokens_per_second=80))
+    import main
+"""
+import asyncio
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+KNOWN_TABLES = (
+    "services",
+    "service_embeddings",
+    "ai_config",
+    "chat_sessions",
+    "chat_history",
+    "admin_users",
+)
+
+
+# ============================================
+# SUPABASE / POSTGREST
+# ============================================
+
+def _ordered(value: Any) -> Any:
+    """Angka dibandingkan sebagai angka (summary_turns), sisanya sebagai string (timestamp ISO)."""
+    return value if isinstance(value, (int, float)) else str(value)
+
+
+class FakeAPIError(Exception):
+    """Dilempar untuk tabel/RPC yang tidak ada, seperti PostgREST."""
+
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+class FakeDatabase:
+    """
+    Tabel in-memory (list of dict) dengan latency per query yang bisa diatur.
+
+    Args:
+        latency_ms: Latency buatan untuk setiap query (round trip ke Supabase)
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.tables: Dict[str, List[dict]] = {name: [] for name in KNOWN_TABLES}
+        self.lock = threading.Lock()
+        self.query_count = 0
+        self._ids = itertools.count(1)
+
+    def _default_row(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        now = datetime.now().isoformat()
+        if table == "chat_sessions":
+            row.setdefault("id", next(self._ids))
+            row.setdefault("session_id", str(uuid.uuid4()))
+            row.setdefault("is_active", True)
+            row.setdefault("summary_turns", 0)
+            row.setdefault("created_at", now)
+        elif table in ("services", "admin_users"):
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", now)
+        else:
+            row.setdefault("id", next(self._ids))
+            row.setdefault("created_at", now)
+        return row
+
+    def insert(self, table: str, rows: List[dict]) -> List[dict]:
+        with self.lock:
+            created = [self._default_row(table, row) for row in rows]
+            self._table(table).extend(created)
+            return [dict(row) for row in created]
+
+    def _table(self, table: str) -> List[dict]:
+        if table not in self.tables:
+            raise FakeAPIError(f'relation "public.{table}" does not exist')
+        return self.tables[table]
+
+    def match_service_embeddings(self, params: dict) -> List[dict]:
+        """Padanan RPC match_service_embeddings (cosine distance < match_threshold)."""
+        query = np.asarray(params["query_embedding"], dtype=np.float32)
+        with self.lock:
+            rows = list(self.tables["service_embeddings"])
+        results = []
+        for row in rows:
+            embedding = row["embedding"]
+            if isinstance(embedding, str):
+                embedding = json.loads(embedding)
+            similarity = float(np.dot(query, np.asarray(embedding, dtype=np.float32)))
+            if 1 - similarity < params["match_threshold"]:
+                results.append({
+                    "service_id": row["service_id"],
+                    "content": row["content"],
+                    "similarity": similarity
+                })
+        results.sort(key=lambda item: item["similarity"], reverse=True)
+        return results[:params["match_count"]]
+
+
+class FakeQuery:
+    """Subset query builder postgrest yang dipakai aplikasi."""
+
+    def __init__(self, db: FakeDatabase, table: str, rpc: Optional[tuple] = None):
+        self.db = db
+        self.table = table
+        self.rpc_call = rpc
+        self.operation = "select"
+        self.columns: Optional[List[str]] = None
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.count: Optional[str] = None
+        self.head = False
+        self.filters: List[tuple] = []
+        self.order_by: Optional[tuple] = None
+        self.row_limit: Optional[int] = None
+        self.row_offset = 0
+
+    # --- operasi ---
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None):
+        cols = ",".join(columns).replace(" ", "")
+        self.columns = None if cols in ("", "*") else cols.split(",")
+        self.count = count
+        self.head = bool(head)
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.operation, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id", **kwargs):
+        self.operation, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, data: dict, **kwargs):
+        self.operation, self.payload = "update", data
+        return self
+
+    def delete(self, **kwargs):
+        self.operation = "delete"
+        return self
+
+    # --- filter & modifier ---
+    def _filter(self, column: str, op, value):
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda a, b: a == b or str(a) == str(b), value)
+
+    def neq(self, column, value):
+        return self._filter(column, lambda a, b: str(a) != str(b), value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and _ordered(a) > _ordered(b), value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and _ordered(a) >= _ordered(b), value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and _ordered(a) < _ordered(b), value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and _ordered(a) <= _ordered(b), value)
+
+    def in_(self, column, values):
+        values = {str(value) for value in values}
+        return self._filter(column, lambda a, b: str(a) in b, values)
+
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.row_limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self.row_offset, self.row_limit = start, end - start + 1
+        return self
+
+    # --- eksekusi ---
+    def _matches(self, row: dict) -> bool:
+        return all(op(row.get(column), value) for column, op, value in self.filters)
+
+    def _project(self, row: dict) -> dict:
+        if self.columns is None:
+            return dict(row)
+        return {column: row.get(column) for column in self.columns}
+
+    def _run(self) -> FakeResponse:
+        db = self.db
+        db.query_count += 1
+
+        if self.rpc_call is not None:
+            name, params = self.rpc_call
+            if name == "match_service_embeddings":
+                return FakeResponse(db.match_service_embeddings(params))
+            if name == "cleanup_inactive_sessions":
+                return FakeResponse(0)
+            raise FakeAPIError(f"function public.{name} does not exist")
+
+        if self.operation == "insert":
+            return FakeResponse(db.insert(self.table, self.payload))
+
+        with db.lock:
+            table = db._table(self.table)
+
+            if self.operation == "upsert":
+                key = self.on_conflict
+                index = {str(row.get(key)): row for row in table}
+                result = []
+                for item in self.payload:
+                    existing = index.get(str(item.get(key)))
+                    if existing is not None:
+                        existing.update(item)
+                        result.append(dict(existing))
+                    else:
+                        row = db._default_row(self.table, item)
+                        table.append(row)
+                        index[str(row.get(key))] = row
+                        result.append(dict(row))
+                return FakeResponse(result)
+
+            rows = [row for row in table if self._matches(row)]
+
+            if self.operation == "update":
+                for row in rows:
+                    row.update(self.payload)
+                return FakeResponse([dict(row) for row in rows])
+
+            if self.operation == "delete":
+                removed = {id(row) for row in rows}
+                table[:] = [row for row in table if id(row) not in removed]
+                return FakeResponse([dict(row) for row in rows])
+
+            if self.order_by is not None:
+                column, desc = self.order_by
+                rows.sort(key=lambda row: str(row.get(column)), reverse=desc)
+            total = len(rows)
+            if self.row_limit is not None:
+                rows = rows[self.row_offset:self.row_offset + self.row_limit]
+            data = [] if self.head else [self._project(row) for row in rows]
+            return FakeResponse(data, total if self.count else None)
+
+
+class _SyncQuery(FakeQuery):
+    def execute(self) -> FakeResponse:
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        return self._run()
+
+
+class _AsyncQuery(FakeQuery):
+    async def execute(self) -> FakeResponse:
+        if self.db.latency:
+            await asyncio.sleep(self.db.latency)
+        return self._run()
+
+
+class FakeClient:
+    """Pengganti supabase.Client (sync)."""
+
+    _query_class = _SyncQuery
+
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+
+    def table(self, name: str) -> FakeQuery:
+        return self._query_class(self.db, name)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> FakeQuery:
+        return self._query_class(self.db, "", rpc=(name, params or {}))
+
+
+class FakeAsyncClient(FakeClient):
+    """Pengganti supabase.AsyncClient."""
+
+    _query_class = _AsyncQuery
+
+
+# ============================================
+# GEMINI
+# ============================================
+
+@dataclass
+class FakeLLMSettings:
+    """
+    Args:
+        first_token_ms: Latency sampai token pertama
+        tokens_per_second: Kecepatan generasi setelah token pertama
+        answer_tokens: Panjang jawaban (jumlah kata)
+        chunk_tokens: Jumlah kata per chunk saat streaming
+    """
+    first_token_ms: float = 400.0
+    tokens_per_second: float = 60.0
+    answer_tokens: int = 120
+    chunk_tokens: int = 8
+
+
+class _FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = [text] if text else []
+
+
+class _FakeStream:
+    def __init__(self, words: List[str], settings: FakeLLMSettings):
+        self.words = words
+        self.settings = settings
+
+    async def __aiter__(self):
+        settings = self.settings
+        await asyncio.sleep(settings.first_token_ms / 1000)
+        for start in range(0, len(self.words), settings.chunk_tokens):
+            chunk = self.words[start:start + settings.chunk_tokens]
+            if start:
+                await asyncio.sleep(len(chunk) / settings.tokens_per_second)
+            yield _FakeChunk(" ".join(chunk) + " ")
+
+
+class FakeGenerativeModel:
+    """Pengganti genai.GenerativeModel: jawaban sintetis dengan latency terukur."""
+
+    def __init__(self, settings: FakeLLMSettings):
+        self.settings = settings
+        self.calls = 0
+
+    def _answer_words(self, prompt: str) -> List[str]:
+        match = re.search(r'PERTANYAAN PENGGUNA SAAT INI:\s*"([^"]*)"', prompt) or re.search(r'"([^"]*)"', prompt)
+        seed = (match.group(1) if match else "layanan").split() or ["layanan"]
+        return list(itertools.islice(itertools.cycle(seed), self.settings.answer_tokens))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        words = self._answer_words(prompt)
+        if stream:
+            return _FakeStream(words, self.settings)
+        settings = self.settings
+        await asyncio.sleep(settings.first_token_ms / 1000 + len(words) / settings.tokens_per_second)
+        return _FakeChunk(" ".join(words))
+
+
+# ============================================
+# EMBEDDINGS
+# ============================================
+
+class FakeEmbeddings:
+    """
+    Embedding hashing bag-of-words (deterministik, tanpa download model).
+    Kata yang sama menghasilkan dimensi yang sama, jadi similarity tetap bermakna.
+    """
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(token.encode("utf-8")) % self.dimension] += 1.0
+        return vector
+
+    def embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        return [self.embed(text) for text in texts]
+
+
+# ============================================
+# INSTALASI
+# ============================================
+
+def install_fakes(
+    db: FakeDatabase,
+    llm: Optional[FakeLLMSettings] = None,
+    fake_embeddings: bool = False
+) -> None:
+    """
+    Ganti factory client Supabase (dan opsional model embedding) dengan fake.
+    Harus dipanggil sebelum `app.database.client` / `main` di-import.
+    Fake LLM dipasang lewat `install_fake_llm` setelah import.
+    """
+    import supabase
+
+    os.environ.setdefault("SUPABASE_URL", "http://fake-supabase.local")
+    os.environ.setdefault("SUPABASE_ANON_KEY", "fake-anon-key")
+
+    async def fake_acreate_client(url, key, options=None):
+        return FakeAsyncClient(db)
+
+    supabase.create_client = lambda url, key, options=None: FakeClient(db)
+    supabase.acreate_client = fake_acreate_client
+
+    if fake_embeddings:
+        import chonkie
+        chonkie.AutoEmbeddings.get_embeddings = staticmethod(lambda *args, **kwargs: FakeEmbeddings())
+
+
+def install_fake_llm(settings: FakeLLMSettings) -> FakeGenerativeModel:
+    """Semua model dari registry llm_service menjadi satu FakeGenerativeModel."""
+    from app.services import llm_service
+
+    model = FakeGenerativeModel(settings)
+    llm_service._build_model = lambda api_key, model_name, gen_config: model
+    llm_service._models.clear()
+    return model
+
+
+def load_services(path: str) -> List[dict]:
+    """Baca layanan dari layanan.json (list of dict kolom tabel services)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def seed_database(db: FakeDatabase, services: List[dict], admin_username: str = "bench-admin") -> None:
+    """
+    Isi tabel dengan layanan, embedding-nya, AI config default, dan satu admin.
+    Butuh `app.services.embedding_service` sudah bisa di-import (setelah install_fakes).
+    """
+    from app.schemas.mpp_service_schemas import Service
+    from app.services.embedding_service import (compute_content_hash,
+                                                pipeline_embedding_batch)
+
+    created = db.insert("services", services)
+    contents, matrix = pipeline_embedding_batch([Service(**row) for row in created])
+    db.insert("service_embeddings", [
+        {
+            "service_id": row["id"],
+            "content": content,
+            "content_hash": compute_content_hash(content),
+            "embedding": embedding
+        }
+        for row, content, embedding in zip(created, contents, matrix.tolist())
+    ])
+    db.insert("ai_config", [
+        {"config_key": "gemini_api_key", "config_value": "fake-gemini-key"},
+        {"config_key": "top_k", "config_value": "3"},
+        {"config_key": "min_similarity", "config_value": "0.3"},
+        {"config_key": "temperature", "config_value": "0.7"},
+        {"config_key": "max_tokens", "config_value": "1024"},
+    ])
+    db.insert("admin_users", [{
+        "username": admin_username,
+        "email": f"{admin_username}@example.com",
+        "password_hash": "",
+        "full_name": "Benchmark Admin",
+        "is_active": True
+    }])
@@ -0,0 +1,169 @@
+"""
+Ukur waktu startup aplikasi: waktu import per modul (`python -X importtime`)
+dan waktu sampai `main` selesai di-import, plus durasi warmup di lifespan.
+
+Setiap run memakai proses Python baru sehingga tidak ada modul yang sudah
+ter-cache di sys.modules. Env Supabase diisi dummy bila belum ada (client
+dibuat secara lazy, jadi tidak ada koneksi saat import).
+
+Contoh:
+    python scripts/benchmarks/import_time.py
+    python scripts/benchmarks/import_time.py --module app.services.embedding_service --top 15
+    python scripts/benchmarks/import_time.py --warmup --fake-embeddings --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WARMUP_CODE = r"""
+import asyncio, json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+from fakes import FakeDatabase, install_fakes
+install_fakes(FakeDatabase(), fake_embeddings="--fake-embeddings" in sys.argv)
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from app.utils import metrics
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        while not main._startup["ready"] and main._startup["error"] is None:
+            await asyncio.sleep(0.005)
+
+asyncio.run(run())
+stages = {stage: row["p50_ms"] for stage, row in metrics.get_latency_summary().items() if stage.startswith("startup_")}
+print(json.dumps({"import_s": imported - start, "ready_s": time.perf_counter() - start,
+                  "error": main._startup["error"], "stages_ms": stages}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Modul yang di-import (default main)")
+    parser.add_argument("--runs", type=int, default=5, help="Jumlah proses; yang dilaporkan median")
+    parser.add_argument("--top", type=int, default=25, help="Jumlah modul termahal yang ditampilkan")
+    parser.add_argument("--warmup", action="store_true",
+                        help="Jalankan juga lifespan warmup (Supabase/Gemini palsu dari fakes.py)")
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Warmup memakai embedding hashing (tanpa download model)")
+    parser.add_argument("--json", help="Tulis hasil ke file JSON")
+    return parser.parse_args()
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://localhost:54321")
+    env.setdefault("SUPABASE_ANON_KEY", "import-time-benchmark")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, float]]:
+    """
+    Baris `import time: self [us] | cumulative | imported package`. Modul yang
+    di-import lebih dari sekali hanya tercatat pada import pertama.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = {"self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000}
+    return modules
+
+
+def measure_import(module: str, env: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_warmup(env: Dict[str, str], fake_embeddings: bool) -> dict:
+    argv = [sys.executable, "-c", WARMUP_CODE, BENCH_DIR] + (["--fake-embeddings"] if fake_embeddings else [])
+    result = subprocess.run(argv, cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Warmup run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_modules(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    names = set.intersection(*(set(run) for run in runs))
+    return {
+        name: {
+            key: round(statistics.median(run[name][key] for run in runs), 2)
+            for key in ("self_ms", "cumulative_ms")
+        }
+        for name in names
+    }
+
+
+def top_level(name: str) -> str:
+    return name.split(".")[0]
+
+
+def main() -> None:
+    args = parse_args()
+    env = child_env()
+
+    modules = median_modules([measure_import(args.module, env) for _ in range(args.runs)])
+    total_ms = modules.get(args.module, {}).get("cumulative_ms")
+
+    # Biaya per paket top-level = jumlah waktu self semua submodulnya
+    packages: Dict[str, float] = {}
+    for name, row in modules.items():
+        packages[top_level(name)] = packages.get(top_level(name), 0.0) + row["self_ms"]
+
+    print(f"import {args.module}: {total_ms} ms (median of {args.runs} runs)\n")
+    print(f"{'package':<40}{'self ms':>10}")
+    for name, self_ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40}{self_ms:>10.2f}")
+
+    app_modules = {name: row for name, row in modules.items() if top_level(name) in ("app", "main")}
+    print(f"\n{'app module':<40}{'self ms':>10}{'cumulative ms':>15}")
+    for name, row in sorted(app_modules.items(), key=lambda item: -item[1]["cumulative_ms"]):
+        print(f"{name:<40}{row['self_ms']:>10.2f}{row['cumulative_ms']:>15.2f}")
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "total_ms": total_ms,
+        "packages_self_ms": {name: round(value, 2) for name, value in packages.items()},
+        "modules": modules
+    }
+
+    if args.warmup:
+        warmups = [measure_warmup(env, args.fake_embeddings) for _ in range(args.runs)]
+        errors = [row["error"] for row in warmups if row["error"]]
+        if errors:
+            print(f"\nWarmup failed: {errors[0]}")
+        stages = {
+            stage: round(statistics.median(row["stages_ms"].get(stage, 0.0) for row in warmups), 2)
+            for stage in warmups[0]["stages_ms"]
+        }
+        report["warmup"] = {
+            "import_s": round(statistics.median(row["import_s"] for row in warmups), 3),
+            "ready_s": round(statistics.median(row["ready_s"] for row in warmups), 3),
+            "stages_ms": stages
+        }
+        print(f"\nimport main {report['warmup']['import_s']}s, ready after {report['warmup']['ready_s']}s")
+        for stage, value in stages.items():
+            print(f"  {stage:<38}{value:>10.2f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Load test offline untuk `main:app` dengan Supabase, Gemini, dan (opsional)
+model embedding palsu dari scripts/benchmarks/fakes.py.
+
+Request dikirim in-process lewat httpx.ASGITransport (lifespan aplikasi ikut
+dijalankan), sehingga yang terukur adalah pipeline aplikasi itu sendiri plus
+latency buatan dari fake.
+
+Contoh:
+    python scripts/benchmarks/load_test.py --concurrency 20 --requests 500
+    python scripts/benchmarks/load_test.py --mix chat=6,stream=2,history=1,dashboard=1 \
+        --db-latency-ms 20 --llm-first-token-ms 300 --llm-tokens-per-second 80 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import (FakeDatabase, FakeLLMSettings, install_fake_llm,  # noqa: E402
+                   install_fakes, load_services, seed_database)
+
+QUESTION_TEMPLATES = (
+    "Apa saja persyaratan {}?",
+    "Berapa lama waktu penyelesaian {}?",
+    "Berapa tarif {}?",
+    "Bagaimana prosedur {}?",
+    "Di mana saya bisa mengurus {}?",
+)
+
+FOLLOW_UPS = (
+    "Kalau biayanya berapa?",
+    "Syaratnya apa saja tadi?",
+    "Berapa hari prosesnya?",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=10, help="Jumlah virtual user bersamaan")
+    parser.add_argument("--requests", type=int, default=200, help="Total request")
+    parser.add_argument("--mix", default="chat=7,stream=2,history=1",
+                        help="Bobot endpoint: chat, stream, history, dashboard")
+    parser.add_argument("--services", default=os.path.join(ROOT, "layanan.json"), help="Sumber layanan")
+    parser.add_argument("--queries", help="JSONL pertanyaan tambahan (field `query`, atau `title`)")
+    parser.add_argument("--turns", type=int, default=3, help="Jumlah pesan per session sebelum session baru")
+    parser.add_argument("--db-latency-ms", type=float, default=10.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=400.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--llm-answer-tokens", type=int, default=120)
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Pakai embedding hashing (tanpa download model)")
+    parser.add_argument("--search-mode", choices=("local", "rpc"), default="local")
+    parser.add_argument("--no-answer-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Tulis hasil ke file JSON")
+    return parser.parse_args()
+
+
+def build_workload(services: List[dict], queries_path: str = None) -> List[str]:
+    queries = [
+        template.format(service["nama_layanan"].strip().lower())
+        for service in services if service.get("nama_layanan")
+        for template in QUESTION_TEMPLATES
+    ]
+    if queries_path:
+        with open(queries_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    text = item.get("query") or item.get("title")
+                    if text:
+                        queries.append(text)
+    return queries
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - {"chat", "stream", "history", "dashboard"}
+    if unknown:
+        raise SystemExit(f"Unknown endpoint in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    import main
+    from app.core.auth import create_access_token
+    from app.services import fast_path, session_service
+    from app.utils import metrics
+
+    install_fake_llm(FakeLLMSettings(
+        first_token_ms=args.llm_first_token_ms,
+        tokens_per_second=args.llm_tokens_per_second,
+        answer_tokens=args.llm_answer_tokens
+    ))
+
+    rng = random.Random(args.seed)
+    queries = build_workload(load_services(args.services), args.queries)
+    weights = parse_mix(args.mix)
+    endpoints, endpoint_weights = list(weights), list(weights.values())
+    admin_headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench-admin'})}"}
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    remaining = iter(range(args.requests))
+
+    transport = httpx.ASGITransport(app=main.app)
+
+    async def virtual_user() -> None:
+        client = None
+        turns = 0
+        try:
+            for _ in remaining:
+                if client is None or turns >= args.turns:
+                    if client is not None:
+                        await client.aclose()
+                    client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120)
+                    turns = 0
+
+                endpoint = rng.choices(endpoints, endpoint_weights)[0]
+                query = rng.choice(FOLLOW_UPS) if turns and rng.random() < 0.3 else rng.choice(queries)
+
+                start = time.perf_counter()
+                try:
+                    if endpoint == "chat":
+                        response = await client.post("/chat/", json={"query": query})
+                        turns += 1
+                    elif endpoint == "stream":
+                        response = await client.post("/chat/stream", json={"query": query})
+                        turns += 1
+                    elif endpoint == "history":
+                        response = await client.get("/chat/history")
+                    else:
+                        response = await client.get("/admin/dashboard/", headers=admin_headers)
+                    ok = response.status_code < 400 or (endpoint == "history" and response.status_code == 400)
+                except Exception:
+                    ok = False
+                latencies[endpoint].append(time.perf_counter() - start)
+                if not ok:
+                    errors[endpoint] += 1
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    async with main.app.router.lifespan_context(main.app):
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        await session_service.flush_pending_writes()
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "elapsed_seconds": round(elapsed, 3),
+        "total_rps": round(sum(len(values) for values in latencies.values()) / elapsed, 2),
+        "endpoints": {},
+        "server_stages": metrics.get_latency_summary(),
+        "prompt_tokens": metrics.get_token_summary(),
+        "fast_path": fast_path.get_stats()
+    }
+    for endpoint, values in sorted(latencies.items()):
+        values.sort()
+        report["endpoints"][endpoint] = {
+            "requests": len(values),
+            "errors": errors[endpoint],
+            "rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\nElapsed {report['elapsed_seconds']}s, {report['total_rps']} req/s total\n")
+    header = f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'rps':>9}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<12}{row['requests']:>10}{row['errors']:>8}{row['rps']:>9}"
+              f"{row['mean_ms']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+
+    print("\nServer-side stages (ms)")
+    for stage, row in report["server_stages"].items():
+        print(f"  {stage:<40} n={row['count']:<6} p50={row['p50_ms']} p95={row['p95_ms']} p99={row['p99_ms']}")
+
+    if report["prompt_tokens"]:
+        print("\nPrompt tokens (estimated)")
+        for part, row in report["prompt_tokens"].items():
+            print(f"  {part:<40} n={row['count']:<6} mean={row['mean']} p50={row['p50']} p95={row['p95']}")
+
+    fast = report["fast_path"]
+    if fast["attempts"]:
+        print(f"\nFast path (tanpa LLM): {fast['hits']}/{fast['attempts']} hit (rate {fast['hit_rate']}), "
+              f"per intent {fast['hits_by_intent']}, diteruskan ke LLM {fast['skipped']}")
+
+
+def main() -> None:
+    args = parse_args()
+
+    os.environ["VECTOR_SEARCH_MODE"] = args.search_mode
+    if args.no_answer_cache:
+        os.environ["ANSWER_CACHE_ENABLED"] = "false"
+
+    db = FakeDatabase(latency_ms=0)
+    install_fakes(db, fake_embeddings=args.fake_embeddings)
+    # Seed tanpa latency, lalu aktifkan latency untuk fase pengukuran
+    seed_database(db, load_services(args.services))
+    db.latency = args.db_latency_ms / 1000
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Micro-benchmark untuk hot path embedding dan prompt.
+
+Setiap case diukur dengan timeit (waktu per panggilan, minimum dari beberapa
+repeat) dan tracemalloc (peak alokasi per panggilan). Input diambil dari
+layanan.json. Hasil dibandingkan dengan baseline JSON supaya regresi
+ketahuan sebelum deploy.
+
+Contoh:
+    python scripts/benchmarks/micro_bench.py                  # ukur dan tampilkan
+    python scripts/benchmarks/micro_bench.py --update         # simpan sebagai baseline
+    python scripts/benchmarks/micro_bench.py --check          # exit 1 jika ada regresi
+    python scripts/benchmarks/micro_bench.py --only prompt    # hanya case yang namanya mengandung "prompt"
+
+Baseline bergantung pada mesin dan model embedding; buat ulang dengan --update
+di mesin yang sama dengan yang menjalankan --check (mis. runner CI). Baseline
+yang di-commit (baselines/micro_bench.json) dibuat dengan --fake-embeddings dan
+dicek di workflow deploy sebelum artefak di-upload.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeDatabase, install_fakes, load_services  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro_bench.json")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update", action="store_true", help="Tulis hasil sebagai baseline baru")
+    parser.add_argument("--check", action="store_true", help="Bandingkan dengan baseline, exit 1 jika regresi")
+    parser.add_argument("--time-tolerance", type=float, default=0.25,
+                        help="Toleransi kenaikan waktu per panggilan (0.25 = 25%%)")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.10,
+                        help="Toleransi kenaikan peak alokasi per panggilan")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Jalankan hanya case yang namanya mengandung teks ini")
+    parser.add_argument("--services", default=os.path.join(ROOT, "layanan.json"))
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Pakai embedding hashing (tanpa download model)")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def build_cases(services: List[dict], seed: int) -> Dict[str, Callable[[], object]]:
+    from app.api.chat_router import compute_answer_metrics
+    from app.schemas.mpp_service_schemas import Service
+    from app.services import embedding_service
+    from app.services.llm_service import build_prompt_with_history
+
+    rng = random.Random(seed)
+    service = Service(id="bench", **rng.choice(services))
+    joined = embedding_service.join_service_content_with_labels(service)
+    processed = embedding_service.preprocess_text(joined)
+    raw_vector = embedding_service.generate_embedding(processed)
+
+    picked = rng.sample(services, 3)
+    search_results = [
+        {
+            "service_id": str(idx),
+            "content": embedding_service.prepare_service_content(Service(id=str(idx), **item)),
+            "similarity": 0.8 - idx * 0.05
+        }
+        for idx, item in enumerate(picked)
+    ]
+    query = f"Apa saja persyaratan {picked[0]['nama_layanan'].lower()}?"
+    conversation_context = "\n".join([
+        f"Pengguna: Bagaimana prosedur {picked[1]['nama_layanan'].lower()}?",
+        f"Asisten: {search_results[1]['content'][:400]}",
+        f"Pengguna: Berapa tarif {picked[2]['nama_layanan'].lower()}?",
+        f"Asisten: {search_results[2]['content'][:400]}",
+        f"Pengguna: {query}",
+    ])
+    answer = " ".join(search_results[0]["content"].split()[:120])
+
+    loop = asyncio.new_event_loop()
+    # Embedding yang dipakai metrik di-cache saat request sungguhan; yang diukur di sini
+    # adalah loop cosine + lookup cache, bukan model
+    loop.run_until_complete(compute_answer_metrics(query, answer, search_results))
+
+    return {
+        "join_service_content_with_labels": lambda: embedding_service.join_service_content_with_labels(service),
+        "preprocess_text": lambda: embedding_service.preprocess_text(joined),
+        "generate_embedding": lambda: embedding_service.generate_embedding(processed),
+        "normalize_vector": lambda: embedding_service.normalize_vector(raw_vector),
+        "pipeline_embedding": lambda: embedding_service.pipeline_embedding(service),
+        "build_prompt_with_history": lambda: build_prompt_with_history(query, search_results, conversation_context),
+        "chat_router_answer_metrics": lambda: loop.run_until_complete(
+            compute_answer_metrics(query, answer, search_results)
+        ),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Tuple[float, float, int]:
+    """
+    Returns:
+        (us per panggilan terbaik, median us per panggilan, peak alokasi per panggilan dalam bytes)
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [total / number * 1e6 for total in timer.repeat(repeat=repeat, number=number)]
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    return min(runs), statistics.median(runs), int(statistics.median(peaks))
+
+
+def environment_info(fake_embeddings: bool) -> Dict[str, str]:
+    import numpy as np
+
+    from app.services.embedding_service import EMBEDDING_MODEL_NAME
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": f"{platform.system()} {platform.machine()}",
+        "embedding_model": "fake-hashing" if fake_embeddings else EMBEDDING_MODEL_NAME,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], args: argparse.Namespace) -> List[str]:
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            regressions.append(f"{name}: not in baseline (jalankan --update)")
+            continue
+        if row["best_us"] > base["best_us"] * (1 + args.time_tolerance):
+            regressions.append(f"{name}: {row['best_us']:.2f}us vs baseline {base['best_us']:.2f}us")
+        if row["peak_alloc_bytes"] > base["peak_alloc_bytes"] * (1 + args.alloc_tolerance) + 256:
+            regressions.append(
+                f"{name}: peak alloc {row['peak_alloc_bytes']}B vs baseline {base['peak_alloc_bytes']}B"
+            )
+    return regressions
+
+
+def main() -> None:
+    args = parse_args()
+
+    install_fakes(FakeDatabase(), fake_embeddings=args.fake_embeddings)
+    cases = build_cases(load_services(args.services), args.seed)
+    if args.only:
+        cases = {name: fn for name, fn in cases.items() if args.only in name}
+
+    results = {}
+    print(f"{'case':<36}{'best us':>12}{'median us':>12}{'peak alloc':>14}")
+    for name, fn in cases.items():
+        best, median, peak = measure(fn, args.repeat)
+        results[name] = {"best_us": round(best, 3), "median_us": round(median, 3), "peak_alloc_bytes": peak}
+        print(f"{name:<36}{best:>12.2f}{median:>12.2f}{peak:>13}B")
+
+    env = environment_info(args.fake_embeddings)
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            raise SystemExit(f"Baseline not found: {args.baseline} (buat dengan --update)")
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != env:
+            print(f"\nWarning: environment differs from baseline {baseline.get('environment')}")
+        regressions = compare(results, baseline["results"], args)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+    if args.update:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        existing = {}
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                existing = json.load(f).get("results", {})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "environment": env,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "results": {**existing, **results}
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
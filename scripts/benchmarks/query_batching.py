@@ -0,0 +1,114 @@
+"""
+Bandingkan embed_query_async dengan dan tanpa micro-batching (QueryEncoder)
+pada beberapa tingkat konkurensi.
+
+Setiap round mengirim `concurrency` query unik bersamaan (cache miss semua),
+lalu diukur wall time, CPU time proses (time.process_time, semua thread) per
+query, dan rata-rata ukuran batch yang terbentuk.
+
+Contoh:
+    python scripts/benchmarks/query_batching.py
+    python scripts/benchmarks/query_batching.py --concurrency 1,10,100 --wait-ms 2 --max-batch 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeDatabase, install_fakes, load_services  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,10,100", help="Daftar tingkat konkurensi")
+    parser.add_argument("--queries", type=int, default=2000, help="Jumlah query per konfigurasi")
+    parser.add_argument("--wait-ms", type=float, default=2.0, help="QUERY_BATCH_WAIT_MS untuk mode batch")
+    parser.add_argument("--max-batch", type=int, default=32, help="QUERY_BATCH_MAX_SIZE untuk mode batch")
+    parser.add_argument("--services", default=os.path.join(ROOT, "layanan.json"))
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Pakai embedding hashing (tanpa download model)")
+    parser.add_argument("--json", help="Tulis hasil ke file JSON")
+    return parser.parse_args()
+
+
+def build_queries(services: List[dict], count: int) -> List[str]:
+    names = [service["nama_layanan"].strip().lower() for service in services if service.get("nama_layanan")]
+    templates = ("apa saja persyaratan {}", "berapa lama proses {}", "bagaimana cara mengurus {}")
+    # Nomor di akhir membuat setiap query unik sehingga tidak ada cache hit
+    return [f"{templates[i % len(templates)].format(names[i % len(names)])} {i}" for i in range(count)]
+
+
+async def run_config(queries: List[str], concurrency: int, wait_ms: float, max_batch: int) -> Dict[str, float]:
+    from app.services import embedding_service
+
+    embedding_service.QUERY_BATCH_WAIT_MS = wait_ms
+    embedding_service.QUERY_BATCH_MAX_SIZE = max_batch
+    embedding_service._query_encoder = None
+    embedding_service.clear_query_cache()
+
+    latencies = []
+
+    async def one(text: str) -> None:
+        start = time.perf_counter()
+        await embedding_service.embed_query_async(text)
+        latencies.append(time.perf_counter() - start)
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for offset in range(0, len(queries), concurrency):
+        await asyncio.gather(*(one(text) for text in queries[offset:offset + concurrency]))
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    stats = embedding_service.get_query_batch_stats()
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "mode": "batch" if wait_ms > 0 else "single",
+        "queries_per_s": round(len(queries) / wall, 1),
+        "cpu_us_per_query": round(cpu / len(queries) * 1e6, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000, 3),
+        "mean_batch_size": stats.get("mean_batch_size", 1.0)
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, float]]:
+    from app.services import embedding_service
+
+    queries = build_queries(load_services(args.services), args.queries)
+    # Muat model dan panaskan thread pool sebelum pengukuran
+    embedding_service.get_embeddings_model()
+    await run_config(queries[:64], 8, args.wait_ms, args.max_batch)
+
+    results = []
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        for wait_ms in (0.0, args.wait_ms):
+            results.append(await run_config(queries, concurrency, wait_ms, args.max_batch))
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    install_fakes(FakeDatabase(), fake_embeddings=args.fake_embeddings)
+
+    results = asyncio.run(run(args))
+
+    print(f"{'concurrency':>11}{'mode':>8}{'q/s':>10}{'CPU us/q':>10}{'p50 ms':>9}{'p99 ms':>9}{'batch':>7}")
+    for row in results:
+        print(f"{row['concurrency']:>11}{row['mode']:>8}{row['queries_per_s']:>10}{row['cpu_us_per_query']:>10}"
+              f"{row['p50_ms']:>9}{row['p99_ms']:>9}{row['mean_batch_size']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Export model model2vec ke direktori artefak lokal untuk EMBEDDING_MODEL_PATH.
+
+Isi direktori:
+    embeddings.npy      tabel embedding (dimuat dengan mmap_mode="r")
+    tokenizer.json      tokenizer Hugging Face
+    config.json         config model + normalize / base_model_name / language
+    weights.npy         (opsional, model dengan vocabulary quantization)
+    token_mapping.npy   (opsional, model dengan vocabulary quantization)
+
+Contoh:
+    python scripts/export_embedding_model.py --output models/embedding
+    EMBEDDING_MODEL_PATH=models/embedding uvicorn main:app
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "minishlab/potion-base-32M"),
+                        help="Nama model di Hugging Face atau direktori model2vec lokal")
+    parser.add_argument("--output", required=True, help="Direktori tujuan artefak")
+    return parser.parse_args()
+
+
+def export_model(model_name: str, output: str) -> None:
+    from model2vec import StaticModel
+
+    model = StaticModel.from_pretrained(model_name)
+    os.makedirs(output, exist_ok=True)
+
+    # Array C-contiguous supaya bisa di-mmap langsung tanpa salinan
+    np.save(os.path.join(output, "embeddings.npy"), np.ascontiguousarray(model.embedding))
+    if model.weights is not None:
+        np.save(os.path.join(output, "weights.npy"), np.ascontiguousarray(model.weights))
+    if model.token_mapping is not None:
+        np.save(os.path.join(output, "token_mapping.npy"), np.ascontiguousarray(model.token_mapping))
+
+    model.tokenizer.save(os.path.join(output, "tokenizer.json"))
+
+    config = {
+        **model.config,
+        "normalize": model.normalize,
+        "base_model_name": model.base_model_name or model_name,
+        "language": model.language,
+        "source_model": model_name
+    }
+    with open(os.path.join(output, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    verify_export(model, output)
+    print(f"Exported {model_name} ({model.embedding.shape[0]} x {model.dim}) to {output}")
+
+
+def verify_export(model, output: str) -> None:
+    """Pastikan artefak menghasilkan embedding yang identik dengan model asal."""
+    import sys
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from app.services.embedding_service import load_local_embeddings
+
+    sample = ["persyaratan pembuatan akta kelahiran", "berapa biaya izin usaha mikro"]
+    exported = load_local_embeddings(output)
+    expected = model.encode(sample)
+    actual = np.asarray(exported.embed_batch(sample))
+    if not np.allclose(expected, actual, atol=1e-6):
+        raise SystemExit("Exported model does not reproduce the source embeddings")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    export_model(args.model, args.output)
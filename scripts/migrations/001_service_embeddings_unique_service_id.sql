@@ -0,0 +1,3 @@
+-- Satu baris embedding per layanan; dibutuhkan untuk upsert saat reindex.
+create unique index if not exists service_embeddings_service_id_key
+    on public.service_embeddings (service_id);
@@ -0,0 +1,9 @@
+-- SHA-256 (hex) dari teks yang di-embed (kolom content), dipakai untuk
+-- melewati re-embedding ketika teks layanan tidak berubah.
+alter table public.service_embeddings
+    add column if not exists content_hash text;
+
+-- Backfill baris lama: content menyimpan teks persis yang di-embed.
+update public.service_embeddings
+    set content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+    where content_hash is null and content is not null;
@@ -0,0 +1,3 @@
+-- Dibutuhkan untuk upsert batch last_activity (on_conflict=session_id).
+create unique index if not exists chat_sessions_session_id_key
+    on public.chat_sessions (session_id);
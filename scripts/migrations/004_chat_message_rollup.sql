@@ -0,0 +1,82 @@
+-- Counter pesan chat yang diperbarui trigger saat chat_history ditulis,
+-- supaya analytics dashboard cukup membaca beberapa baris (tidak scan chat_history).
+create table if not exists public.chat_message_totals (
+    role text primary key,
+    message_count bigint not null default 0
+);
+
+create table if not exists public.chat_message_daily (
+    day date not null,
+    role text not null,
+    message_count bigint not null default 0,
+    primary key (day, role)
+);
+
+-- Statement-level trigger: satu multi-row insert (write-behind batch) hanya
+-- menghasilkan satu upsert per (role) dan per (day, role).
+create or replace function public.chat_history_rollup_insert()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into chat_message_totals (role, message_count)
+        select role, count(*) from new_rows group by role
+        on conflict (role) do update
+            set message_count = chat_message_totals.message_count + excluded.message_count;
+
+    insert into chat_message_daily (day, role, message_count)
+        select created_at::date, role, count(*) from new_rows group by 1, 2
+        on conflict (day, role) do update
+            set message_count = chat_message_daily.message_count + excluded.message_count;
+
+    return null;
+end;
+$$;
+
+create or replace function public.chat_history_rollup_delete()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update chat_message_totals t
+        set message_count = greatest(t.message_count - d.n, 0)
+        from (select role, count(*) as n from old_rows group by role) d
+        where t.role = d.role;
+
+    update chat_message_daily t
+        set message_count = greatest(t.message_count - d.n, 0)
+        from (select created_at::date as day, role, count(*) as n from old_rows group by 1, 2) d
+        where t.day = d.day and t.role = d.role;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists chat_history_rollup_insert on public.chat_history;
+create trigger chat_history_rollup_insert
+    after insert on public.chat_history
+    referencing new table as new_rows
+    for each statement execute function public.chat_history_rollup_insert();
+
+drop trigger if exists chat_history_rollup_delete on public.chat_history;
+create trigger chat_history_rollup_delete
+    after delete on public.chat_history
+    referencing old table as old_rows
+    for each statement execute function public.chat_history_rollup_delete();
+
+-- Backfill dari history yang sudah ada. Lock mencegah insert baru terhitung dua kali.
+begin;
+lock table public.chat_history in share row exclusive mode;
+
+truncate public.chat_message_totals, public.chat_message_daily;
+
+insert into public.chat_message_totals (role, message_count)
+    select role, count(*) from public.chat_history group by role;
+
+insert into public.chat_message_daily (day, role, message_count)
+    select created_at::date, role, count(*) from public.chat_history group by 1, 2;
+commit;
@@ -0,0 +1,5 @@
+-- Ringkasan percakapan bergulir per session (lihat app/services/conversation_summary.py).
+-- Prompt memakai ringkasan ini + satu pertukaran terakhir, bukan N pesan mentah.
+alter table public.chat_sessions
+    add column if not exists summary text,
+    add column if not exists summary_turns integer not null default 0;
@@ -0,0 +1,35 @@
+import unittest
+
+from app.services.context_assembler import assemble_service_context
+
+
+class AssembleServiceContextTest(unittest.TestCase):
+    def test_short_segments_are_kept_for_every_service(self):
+        results = [
+            {"service_id": "1", "similarity": 0.9, "content": "Nama layanan: NPWP Orang Pribadi. biaya: gratis."},
+            {"service_id": "2", "similarity": 0.8, "content": "Nama layanan: NPWP Badan. biaya: gratis."},
+        ]
+
+        assembled, stats = assemble_service_context("berapa biaya npwp", results, budget_tokens=0, service_tokens=0)
+
+        self.assertEqual([item["service_id"] for item in assembled], ["1", "2"])
+        for item in assembled:
+            self.assertIn("biaya: gratis.", item["content"])
+        self.assertEqual(stats["duplicate_tokens_dropped"], 0)
+
+    def test_long_repeated_segments_are_dropped(self):
+        pengaduan = "Pengaduan dapat disampaikan melalui kanal resmi pemerintah kota denpasar."
+        results = [
+            {"service_id": "1", "similarity": 0.9, "content": f"Nama layanan: KTP. {pengaduan}"},
+            {"service_id": "2", "similarity": 0.8, "content": f"Nama layanan: KK. {pengaduan}"},
+        ]
+
+        assembled, stats = assemble_service_context("syarat ktp", results, budget_tokens=0, service_tokens=0)
+
+        self.assertIn(pengaduan, assembled[0]["content"])
+        self.assertNotIn(pengaduan, assembled[1]["content"])
+        self.assertGreater(stats["duplicate_tokens_dropped"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
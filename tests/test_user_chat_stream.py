@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "scripts", "benchmarks"))
+
+from fakes import (FakeDatabase, FakeGenerativeModel, FakeLLMSettings,  # noqa: E402
+                   _FakeChunk, install_fake_llm, install_fakes,
+                   load_services, seed_database)
+
+db = FakeDatabase(latency_ms=0)
+install_fakes(db, fake_embeddings=True)
+seed_database(db, load_services(os.path.join(ROOT, "layanan.json")))
+# Similarity embedding palsu rendah; turunkan ambang agar pertanyaan sampai ke LLM
+for row in db.tables["ai_config"]:
+    if row["config_key"] == "min_similarity":
+        row["config_value"] = "0.1"
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from app.services import answer_cache, llm_service  # noqa: E402
+
+
+class _BrokenStream:
+    """Stream Gemini yang gagal setelah beberapa potongan teks."""
+
+    async def __aiter__(self):
+        yield _FakeChunk("Persyaratan pembuatan KTP adalah ")
+        raise RuntimeError("stream reset")
+
+
+class _BrokenStreamModel(FakeGenerativeModel):
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        return _BrokenStream()
+
+
+def _sse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class UserChatStreamTest(unittest.TestCase):
+    def setUp(self):
+        answer_cache.clear()
+
+    async def _stream(self, query: str) -> list:
+        transport = httpx.ASGITransport(app=main.app)
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/chat/stream", json={"query": query})
+        self.assertEqual(response.status_code, 200)
+        return _sse_events(response.text)
+
+    def test_answer_cut_short_by_stream_error_is_not_cached(self):
+        model = install_fake_llm(FakeLLMSettings())
+        broken = _BrokenStreamModel(model.settings)
+        llm_service._build_model = lambda api_key, model_name, gen_config: broken
+        llm_service._models.clear()
+
+        events = asyncio.run(self._stream("apa syarat membuat ktp"))
+
+        self.assertEqual(broken.calls, 1)
+        answer = events[-1][1]["answer"]
+        self.assertTrue(answer.startswith("Persyaratan pembuatan KTP adalah "))
+        self.assertIn(llm_service.ERROR_RESPONSE_PREFIX, answer)
+        self.assertEqual(answer_cache.get_stats()["size"], 0)
+
+    def test_complete_answer_is_cached(self):
+        model = install_fake_llm(FakeLLMSettings(first_token_ms=0, tokens_per_second=1e6, answer_tokens=10))
+
+        events = asyncio.run(self._stream("apa syarat membuat ktp"))
+
+        self.assertEqual(model.calls, 1)
+        self.assertNotIn(llm_service.ERROR_RESPONSE_PREFIX, events[-1][1]["answer"])
+        self.assertEqual(answer_cache.get_stats()["size"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()